@@ -0,0 +1,3 @@
+"""Benchmarks for git-hooks. Run them from the repository root, e.g. `python -m
+benchmarks.bench_linear_schema`. Each benchmark prints its results as JSON on stdout.
+"""
@@ -0,0 +1,79 @@
+"""Run the benchmark suite and emit a single JSON report, e.g. to track
+regressions across releases.
+Usage: python -m benchmarks [--output report.json] [--runs N]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from importlib import metadata
+
+from benchmarks import (
+    bench_commit_range,
+    bench_config,
+    bench_hooks,
+    bench_large_msg,
+    bench_linear_batch,
+    bench_linear_schema,
+    bench_rewrite,
+    bench_suggest,
+    bench_sync,
+    load_test,
+)
+
+
+def version() -> str:
+    try:
+        return metadata.version("git-hooks")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=bench_hooks.REPO_ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks")
+    parser.add_argument(
+        "--output", help="file to write the report to instead of stdout"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=20, help="runs per hook latency measurement"
+    )
+    args = parser.parse_args()
+
+    report = {
+        "version": version(),
+        "revision": revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": [
+            bench_hooks.run(args.runs),
+            bench_linear_schema.run(),
+            bench_linear_batch.run(100),
+            bench_commit_range.run(20_000),
+            bench_large_msg.run(100),
+            bench_rewrite.run(20_000),
+            bench_config.run(250),
+            bench_sync.run(20_000),
+            bench_suggest.run(20_000),
+            load_test.run(100, 10),
+        ],
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Time commit-msg --range validation over a synthetic history.
+Usage: python -m benchmarks.bench_commit_range [commits] [jobs]
+"""
+
+import json
+import sys
+import tempfile
+import time
+
+from benchmarks.repo import synthetic_history
+from git_hooks import commit_msg
+
+
+def run(commits: int = 100_000, jobs: int = 1) -> dict:
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        synthetic_history(path, commits, invalid_every=100)
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count = sum(1 for _ in commit_msg.iter_commits(["HEAD"], cwd=path))
+        stream = time.perf_counter() - start
+
+        start = time.perf_counter()
+        invalid = sum(
+            1
+            for _ in commit_msg.iter_invalid_commits(
+                commit_msg.iter_commits(["HEAD"], cwd=path), jobs=jobs
+            )
+        )
+        validate = time.perf_counter() - start
+    return {
+        "benchmark": "commit_range",
+        "commits": count,
+        "invalid": invalid,
+        "jobs": jobs,
+        "setup_s": setup,
+        "stream_s": stream,
+        "validate_s": validate,
+        "commits_per_s": count / validate,
+    }
+
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    json.dump(run(commits, jobs), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Import cost of git_hooks.common with a large per-repository
+configuration (see git_hooks/config.py). Compares no configuration, a
+configuration with the given number of teams on its first use (parsed and
+built, then stored in the cache) and on later uses (served from the cache).
+Usage: python -m benchmarks.bench_config [teams] [runs]
+"""
+
+import json
+import os
+import re
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_hooks import REPO_ROOT
+from git_hooks import common
+
+
+def team_keys(count: int) -> list[str]:
+    # Mostly short keys like Linear generates, plus longer and
+    # alphanumeric ones that need explicit alternatives
+    keys = []
+    for i in range(count):
+        letters = "".join(string.ascii_uppercase[(i // 26**n) % 26] for n in range(3))
+        keys.append(letters[: 2 + i % 3] if i % 4 else f"{letters}{i}")
+    return list(dict.fromkeys(keys))
+
+
+def write_config(path: str, teams: int) -> None:
+    commit_types = {f"type{i}": f"Commit type number {i}" for i in range(20)}
+    with open(os.path.join(path, ".git-hooks.toml"), "w") as fh:
+        fh.write(f"teams = {json.dumps(team_keys(teams))}\n\n[commit-types]\n")
+        fh.writelines(
+            f'{name} = "{description}"\n' for name, description in commit_types.items()
+        )
+
+
+def import_ms(cwd: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import git_hooks.common"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    match = re.search(r"\|\s*(\d+) \|\s*git_hooks\.common$", output, re.MULTILINE)
+    assert match is not None
+    return int(match.group(1)) / 1000
+
+
+def run(teams: int = 250, runs: int = 20) -> dict:
+    with tempfile.TemporaryDirectory() as path:
+        repo = os.path.join(path, "repo")
+        os.makedirs(os.path.join(repo, ".git"))
+        cache_dir = os.path.join(path, "cache")
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT, "GIT_HOOKS_CACHE_DIR": cache_dir}
+        env.pop("GIT_HOOKS_CONFIG", None)
+
+        without_config = [import_ms(repo, env) for _ in range(runs)]
+        write_config(repo, teams)
+        cold = []
+        for _ in range(runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(import_ms(repo, env))
+        warm = [import_ms(repo, env) for _ in range(runs)]
+    return {
+        "benchmark": "config",
+        "teams": teams,
+        # Teams the generic alternatives do not cover, only these make
+        # the patterns larger
+        "explicit_teams": sum(
+            not re.fullmatch(common.generic_team_regex, team)
+            for team in team_keys(teams)
+        ),
+        "runs": runs,
+        "without_config_ms": statistics.median(without_config),
+        "uncached_ms": statistics.median(cold),
+        "cached_ms": statistics.median(warm),
+    }
+
+
+def main():
+    teams = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    json.dump(run(teams, runs), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
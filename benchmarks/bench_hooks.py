@@ -0,0 +1,176 @@
+"""End-to-end hook latency and parser throughput.
+Measures the cold start of each hook entry point, the throughput of
+prepare_commit_msg() and get_exit_code() over a synthetic corpus of
+branch names and messages, and the latency of a full prepare-commit-msg
+run against the local fake Linear server at several latencies.
+Usage: python -m benchmarks.bench_hooks [--runs N] [--latencies MS [MS ...]]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.repo import GIT_ENV, git
+from git_hooks import commit_msg, prepare_commit_msg
+from git_hooks.fake_linear import FakeLinearServer
+
+HOOKS = {
+    "prepare-commit-msg": "git_hooks.prepare_commit_msg",
+    "commit-msg": "git_hooks.commit_msg",
+}
+PREFIXES = ["feat", "fix", "hotfix", "chore", "bharat", ""]
+WORDS = ["add", "payment", "retry", "fix", "company", "search", "bucket", "permission"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def branch_corpus(size: int) -> list[str]:
+    branches = []
+    for i in range(size):
+        prefix = PREFIXES[i % len(PREFIXES)]
+        title = "-".join(WORDS[(i + j) % len(WORDS)] for j in range(1 + i % 5))
+        issue = "" if i % 7 == 0 else f"{['t', 'dae', 'L2'][i % 3]}-{i % 99999 + 1}-"
+        branches.append(f"{prefix}/{issue}{title}" if prefix else f"{issue}{title}")
+    return branches
+
+
+def commit_msg_corpus(size: int) -> list[str]:
+    templates = [
+        "T-{i}/feat: Amazing new feature {i}",
+        "feat: Missing issue {i}",
+        "T-{i}/Missing type {i}",
+        "Merge branch 'feature-{i}'",
+        "",
+        "\n# Please enter the commit message for your changes.\n",
+    ]
+    return [templates[i % len(templates)].format(i=i % 99999 + 1) for i in range(size)]
+
+
+def percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    if len(samples) > 1:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    else:
+        cuts = samples * 99
+    return {
+        "runs": len(samples),
+        "min_ms": samples[0] * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p90_ms": cuts[89] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def hook_command(hook: str) -> list[str]:
+    return [sys.executable, "-m", HOOKS[hook]]
+
+
+def time_hook(hook: str, args: list[str], cwd: str, env: dict, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(hook_command(hook) + args, cwd=cwd, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def throughput(fn, corpus: list) -> dict:
+    start = time.perf_counter()
+    for item in corpus:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    return {
+        "items": len(corpus),
+        "seconds": elapsed,
+        "items_per_s": len(corpus) / elapsed,
+    }
+
+
+def run(
+    runs: int = 20, latencies: list[float] | None = None, corpus_size: int = 20000
+) -> dict:
+    latencies = [0, 50, 200] if latencies is None else latencies
+    results = {"benchmark": "hooks", "python": sys.version.split()[0]}
+    with tempfile.TemporaryDirectory() as path:
+        repo = os.path.join(path, "repo")
+        os.makedirs(repo)
+        git(repo, "init", "-q", "-b", "feat/t-1234-amazing-new-feature")
+        msg_file = os.path.join(path, "COMMIT_EDITMSG")
+        env = {
+            **GIT_ENV,
+            "PYTHONPATH": REPO_ROOT,
+            "GIT_HOOKS_CACHE_DIR": os.path.join(path, "cache"),
+            "GIT_HOOKS_CACHE": "off",
+            "GIT_HOOKS_LINEAR_RATE_LIMIT": "0",
+        }
+        env.pop("LINEAR_API_KEY", None)
+
+        with open(msg_file, "w") as fh:
+            fh.write("T-1234/feat: Amazing new feature\n")
+        results["cold_start"] = {
+            hook: time_hook(hook, [msg_file], repo, env, runs) for hook in HOOKS
+        }
+
+        with mock.patch.object(prepare_commit_msg, "LINEAR_API_KEY", None):
+            branches = branch_corpus(corpus_size)
+            results["throughput"] = {
+                "prepare_commit_msg": throughput(
+                    lambda branch: prepare_commit_msg.prepare_commit_msg("", branch),
+                    branches,
+                ),
+                "get_exit_code": throughput(
+                    commit_msg.get_exit_code, commit_msg_corpus(corpus_size)
+                ),
+            }
+
+        results["linear_latency"] = []
+        for latency_ms in latencies:
+            issues = {
+                "T-1234": {"title": "Amazing new feature", "description": "Details"}
+            }
+            with FakeLinearServer(issues, latency=latency_ms / 1000) as server:
+                linear_env = {
+                    **env,
+                    "LINEAR_API_KEY": "API_KEY",
+                    "LINEAR_API_URL": server.url,
+                }
+                samples = []
+                for _ in range(runs):
+                    with open(msg_file, "w") as fh:
+                        fh.write(f"\n{prepare_commit_msg.EDITOR_TEXT}\n")
+                    start = time.perf_counter()
+                    subprocess.run(
+                        hook_command("prepare-commit-msg") + [msg_file],
+                        cwd=repo,
+                        env=linear_env,
+                        capture_output=True,
+                    )
+                    samples.append(time.perf_counter() - start)
+                results["linear_latency"].append(
+                    {
+                        "server_latency_ms": latency_ms,
+                        "requests": server.requests,
+                        **percentiles(samples),
+                    }
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bench_hooks")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latencies", type=float, nargs="*", default=[0, 50, 200])
+    parser.add_argument("--corpus-size", type=int, default=20000)
+    args = parser.parse_args()
+    json.dump(run(args.runs, args.latencies, args.corpus_size), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Peak memory and wall time of the hooks on a very large commit message,
+e.g. a squash merge or changelog. Each hook runs in its own process on a
+small message and on one of the given size, and the peak RSS of that process
+is reported, so that the difference shows what the message itself costs.
+Usage: python -m benchmarks.bench_large_msg [megabytes]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_hooks import HOOKS, REPO_ROOT, hook_command
+from benchmarks.repo import GIT_ENV, git
+
+# Runs a hook module and prints its peak RSS in bytes on exit. VmHWM is reset
+# by exec, whereas ru_maxrss also accounts for the memory of the parent at
+# fork time, so the latter is only a fallback where /proc is missing
+MEASURE = """
+import atexit, resource, runpy, sys
+
+def max_rss():
+    try:
+        with open("/proc/self/status") as fh:
+            lines = (line for line in fh if line.startswith("VmHWM:"))
+            return next(int(line.split()[1]) * 1024 for line in lines)
+    except (OSError, StopIteration):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+atexit.register(lambda: print(max_rss()))
+sys.argv = sys.argv[1:]
+runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+"""
+LINE = "- Changelog entry for a squashed commit with a reasonably long description\n"
+
+
+def write_message(path: str, megabytes: float) -> int:
+    with open(path, "w") as fh:
+        fh.write("\n")
+        lines = int(megabytes * (1 << 20) / len(LINE))
+        block = LINE * 1000
+        for _ in range(lines // 1000):
+            fh.write(block)
+        fh.write(LINE * (lines % 1000))
+        fh.write("# Please enter the commit message for your changes.\n")
+    return os.path.getsize(path)
+
+
+def run_hook(hook: str, msg_file: str, cwd: str, env: dict) -> dict:
+    _, _, module = hook_command(hook)
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-c", MEASURE, module, msg_file],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    max_rss = int(process.stdout.split()[-1])
+    return {"seconds": elapsed, "max_rss_mb": max_rss / (1 << 20)}
+
+
+def run(megabytes: float = 100) -> dict:
+    results = {"benchmark": "large_msg", "megabytes": megabytes, "hooks": {}}
+    with tempfile.TemporaryDirectory() as path:
+        repo = os.path.join(path, "repo")
+        os.makedirs(repo)
+        git(repo, "init", "-q", "-b", "feat/t-1234-amazing-new-feature")
+        env = {
+            **GIT_ENV,
+            "PYTHONPATH": REPO_ROOT,
+            "GIT_HOOKS_CACHE_DIR": os.path.join(path, "cache"),
+        }
+        env.pop("LINEAR_API_KEY", None)
+
+        small_file = os.path.join(path, "SMALL_EDITMSG")
+        large_file = os.path.join(path, "LARGE_EDITMSG")
+        for hook in HOOKS:
+            write_message(small_file, 0)
+            results["message_bytes"] = write_message(large_file, megabytes)
+            small = run_hook(hook, small_file, repo, env)
+            large = run_hook(hook, large_file, repo, env)
+            results["hooks"][hook] = {
+                "small": small,
+                "large": large,
+                "extra_rss_mb": large["max_rss_mb"] - small["max_rss_mb"],
+            }
+    return results
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    json.dump(run(megabytes), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
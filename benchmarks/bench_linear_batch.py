@@ -0,0 +1,68 @@
+"""Compare fetching issues one request at a time with batched fetching
+against the local fake Linear server.
+Usage: python -m benchmarks.bench_linear_batch [issues] [latency_ms]
+"""
+
+import json
+import sys
+import time
+from unittest import mock
+
+from git_hooks import prepare_commit_msg, ratelimit
+from git_hooks.fake_linear import FakeLinearServer
+
+
+def run(count: int = 500, latency_ms: float = 20) -> dict:
+    issues = {
+        f"T-{i}": {"title": f"Issue {i}", "description": f"Description of issue {i}"}
+        for i in range(1, count + 1)
+    }
+    results = []
+    # The fake server is not rate limited, the local budget would only
+    # measure how long it makes requests wait
+    with FakeLinearServer(
+        issues, latency=latency_ms / 1000
+    ) as server, mock.patch.object(
+        prepare_commit_msg, "LINEAR_API_URL", server.url
+    ), mock.patch.object(ratelimit, "RATE_LIMIT", 0):
+        for name, fetch in (
+            (
+                "per_issue",
+                lambda: [prepare_commit_msg.retrieve_linear_issue(i) for i in issues],
+            ),
+            (
+                "batched",
+                lambda: prepare_commit_msg.retrieve_linear_issues(list(issues)),
+            ),
+        ):
+            server.reset_stats()
+            start = time.perf_counter()
+            fetch()
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "mode": name,
+                    "seconds": elapsed,
+                    "requests": server.requests,
+                    "bytes_sent": server.bytes_received,
+                    "bytes_received": server.bytes_sent,
+                }
+            )
+    return {
+        "benchmark": "linear_batch",
+        "issues": count,
+        "latency_ms": latency_ms,
+        "batch_size": prepare_commit_msg.LINEAR_BATCH_SIZE,
+        "results": results,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    json.dump(run(count, latency_ms), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
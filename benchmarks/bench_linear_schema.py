@@ -0,0 +1,51 @@
+"""Compare Linear round-trips and bytes transferred per issue lookup for
+each GIT_HOOKS_LINEAR_SCHEMA mode. Note that "remote" downloads the
+introspection result of the bundled snapshot here; Linear's full schema
+is several megabytes, so the real difference is considerably larger.
+"""
+
+import json
+import sys
+import time
+from unittest import mock
+
+from git_hooks import prepare_commit_msg, ratelimit
+from git_hooks.fake_linear import FakeLinearServer
+
+LOOKUPS = 20
+
+
+def run_mode(mode: str, server: FakeLinearServer) -> dict:
+    server.reset_stats()
+    with mock.patch.object(
+        prepare_commit_msg, "LINEAR_API_URL", server.url
+    ), mock.patch.object(
+        prepare_commit_msg, "LINEAR_SCHEMA_MODE", mode
+    ), mock.patch.object(ratelimit, "RATE_LIMIT", 0):
+        start = time.perf_counter()
+        for _ in range(LOOKUPS):
+            prepare_commit_msg.retrieve_linear_issue("T-1234")
+        elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "round_trips_per_lookup": server.requests / LOOKUPS,
+        "bytes_sent_per_lookup": server.bytes_received / LOOKUPS,
+        "bytes_received_per_lookup": server.bytes_sent / LOOKUPS,
+        "ms_per_lookup": elapsed * 1000 / LOOKUPS,
+    }
+
+
+def run() -> dict:
+    issues = {"T-1234": {"title": "Amazing new feature", "description": "Details"}}
+    with FakeLinearServer(issues) as server:
+        results = [run_mode(mode, server) for mode in ("remote", "bundled", "off")]
+    return {"benchmark": "linear_schema", "results": results}
+
+
+def main():
+    json.dump(run(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
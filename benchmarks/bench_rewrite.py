@@ -0,0 +1,43 @@
+"""Time git-hooks rewrite over a synthetic history in which every commit
+needs rewriting.
+Usage: python -m benchmarks.bench_rewrite [commits]
+"""
+
+import json
+import sys
+import tempfile
+import time
+
+from benchmarks.repo import synthetic_history
+from git_hooks import rewrite
+
+
+def run(commits: int = 100_000) -> dict:
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        synthetic_history(path, commits, invalid_every=1)
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = rewrite.rewrite(
+            ["refs/heads/main"], branch="feat/t-1234-onboarding", cwd=path
+        )
+        elapsed = time.perf_counter() - start
+    return {
+        "benchmark": "rewrite",
+        "commits": stats["commits"],
+        "rewritten": stats["rewritten"],
+        "setup_s": setup,
+        "rewrite_s": elapsed,
+        "commits_per_s": stats["commits"] / elapsed,
+    }
+
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    json.dump(run(commits), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
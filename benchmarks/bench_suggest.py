@@ -0,0 +1,89 @@
+"""Latency of issue suggestions for branches without an issue reference,
+over a large local issue index.
+Usage: python -m benchmarks.bench_suggest [issues]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.bench_hooks import WORDS, branch_corpus, percentiles
+from git_hooks import index
+
+TEAMS = ["T", "L2", "DAE", "PDEV"]
+# Titles draw from a few thousand words with a Zipf-like distribution, like real issue
+# titles do. The words of the branch corpus are spread over common and rare ranks
+VOCABULARY_SIZE = 5000
+
+
+def vocabulary() -> list[str]:
+    words = [
+        f"{consonant}{vowel}{n}x"
+        for n in range(VOCABULARY_SIZE)
+        for consonant, vowel in [("kvzq"[n % 4], "aeiou"[n % 5])]
+    ]
+    for rank, word in enumerate(WORDS):
+        words[rank * rank * 50] = word
+    return words
+
+
+def titles(issues: int) -> list[str]:
+    words = vocabulary()
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [
+        " ".join(rng.choices(words, weights, k=rng.randint(3, 9))).capitalize()
+        for _ in range(issues)
+    ]
+
+
+def run(issues: int = 100_000, lookups: int = 1000) -> dict:
+    results = {"benchmark": "suggest", "issues": issues}
+    with tempfile.TemporaryDirectory() as path:
+        db = os.path.join(path, "issues.sqlite3")
+        issue_titles = titles(issues)
+        start = time.perf_counter()
+        connection = index.connect(db)
+        with connection:
+            index.upsert(
+                connection,
+                [
+                    {
+                        "identifier": f"{TEAMS[i % len(TEAMS)]}-{i + 1}",
+                        "title": title,
+                        "description": None,
+                        "updatedAt": "2024-01-01T00:00:00.000Z",
+                    }
+                    for i, title in enumerate(issue_titles)
+                ],
+            )
+        connection.close()
+        results["build_seconds"] = time.perf_counter() - start
+        results["index_bytes"] = sum(
+            os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+        )
+
+        branches = [branch.replace("/", "-") for branch in branch_corpus(lookups)]
+        with mock.patch.object(index, "index_path", return_value=db):
+            samples = []
+            for branch in branches:
+                words = [word for word in branch.split("-") if len(word) > 2]
+                start = time.perf_counter()
+                index.suggest(words)
+                samples.append(time.perf_counter() - start)
+        results["lookup"] = percentiles(samples)
+    return results
+
+
+def main():
+    issues = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    json.dump(run(issues), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
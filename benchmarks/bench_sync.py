@@ -0,0 +1,69 @@
+"""Throughput of git-hooks sync against the local fake Linear server,
+and lookup latency in the resulting index.
+Usage: python -m benchmarks.bench_sync [issues]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.bench_hooks import percentiles
+from git_hooks import index, prepare_commit_msg, ratelimit
+from git_hooks.fake_linear import FakeLinearServer
+
+TEAMS = ["T", "L2", "DAE", "PDEV"]
+
+
+def run(issues: int = 100_000, lookups: int = 1000) -> dict:
+    results = {"benchmark": "sync", "issues": issues}
+    with tempfile.TemporaryDirectory() as path, FakeLinearServer() as server:
+        for i in range(issues):
+            server.add_issue(
+                f"{TEAMS[i % len(TEAMS)]}-{i + 1}",
+                f"Issue title number {i}",
+                f"Description of issue {i}",
+                updated_at=time.strftime(
+                    "%Y-%m-%dT%H:%M:%S", time.gmtime(1704067200 + i // 1000)
+                )
+                + f".{i % 1000:03d}Z",
+            )
+        db = os.path.join(path, "issues.sqlite3")
+        with mock.patch.object(
+            prepare_commit_msg, "LINEAR_API_URL", server.url
+        ), mock.patch.object(ratelimit, "RATE_LIMIT", 0):
+            start = time.perf_counter()
+            stats = index.sync(TEAMS, path=db)
+            elapsed = time.perf_counter() - start
+            results["full"] = {
+                **stats,
+                "seconds": elapsed,
+                "issues_per_s": stats["issues"] / elapsed,
+                "bytes_received": server.bytes_sent,
+            }
+
+            server.add_issue("T-1", "Renamed", updated_at="2025-01-01T00:00:00.000Z")
+            start = time.perf_counter()
+            stats = index.sync(TEAMS, path=db)
+            results["incremental"] = {**stats, "seconds": time.perf_counter() - start}
+
+        with mock.patch.object(index, "index_path", return_value=db):
+            samples = []
+            for i in range(lookups):
+                start = time.perf_counter()
+                index.get(f"{TEAMS[i % len(TEAMS)]}-{(i * 7919) % issues + 1}")
+                samples.append(time.perf_counter() - start)
+        results["lookup"] = percentiles(samples)
+    return results
+
+
+def main():
+    issues = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    json.dump(run(issues), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
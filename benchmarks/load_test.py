@@ -0,0 +1,187 @@
+"""Load test of prepare-commit-msg against the local fake Linear server (see
+git_hooks/fake_linear.py). Fires the given number of hook runs, that many at
+a time, each in its own process as git would, on branches spread over a
+number of issues, and reports latency percentiles and how the runs ended:
+- linear: the title and description came from Linear (or the cache)
+- fallback: the hook succeeded with the title derived from the branch name, e.g. after a
+  timeout or an error
+- failed: the hook exited with an error
+Every run gets its own cache dir unless --shared-cache is given, so that
+by default every run queries the server.
+Usage: python -m benchmarks.load_test [--runs 200] [--concurrency 20] [--latency-ms 50]
+    [--error-rate 0.05] ...
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_hooks import REPO_ROOT, hook_command, percentiles
+from benchmarks.repo import GIT_ENV, git
+from git_hooks.fake_linear import FakeLinearServer
+from git_hooks.prepare_commit_msg import EDITOR_TEXT
+
+
+def run_hook(
+    path: str, run: int, repo: str, env: dict, shared_cache: bool
+) -> tuple[float, str]:
+    msg_file = os.path.join(path, f"COMMIT_EDITMSG.{run}")
+    with open(msg_file, "w") as fh:
+        fh.write(f"\n{EDITOR_TEXT}\n")
+    if not shared_cache:
+        env = {**env, "GIT_HOOKS_CACHE_DIR": os.path.join(path, f"cache.{run}")}
+    start = time.perf_counter()
+    process = subprocess.run(
+        hook_command("prepare-commit-msg") + [msg_file],
+        cwd=repo,
+        env=env,
+        capture_output=True,
+    )
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        return elapsed, "failed"
+    with open(msg_file) as fh:
+        title = fh.readline()
+    return elapsed, "linear" if "Issue title" in title else "fallback"
+
+
+def run(
+    runs: int = 200,
+    concurrency: int = 20,
+    issues: int = 10,
+    latency_ms: float = 50,
+    error_rate: float = 0,
+    rate_limit: int | None = None,
+    rate_limit_window: float = 60,
+    description_size: int | None = None,
+    shared_cache: bool = False,
+    timeout_ms: int = 3000,
+) -> dict:
+    results = {
+        "benchmark": "load_test",
+        "runs": runs,
+        "concurrency": concurrency,
+        "issues": issues,
+        "latency_ms": latency_ms,
+        "error_rate": error_rate,
+        "rate_limit": rate_limit,
+        "description_size": description_size,
+        "shared_cache": shared_cache,
+    }
+    linear_issues = {
+        f"T-{i}": {
+            "title": f"Issue title {i}",
+            "description": f"Description of issue {i}",
+        }
+        for i in range(1, issues + 1)
+    }
+    with tempfile.TemporaryDirectory() as path, FakeLinearServer(
+        linear_issues,
+        latency=latency_ms / 1000,
+        rate_limit=rate_limit,
+        rate_limit_window=rate_limit_window,
+        error_rate=error_rate,
+        description_size=description_size,
+        seed=0,
+    ) as server:
+        # One repository per issue, the hook takes the issue from the branch checked out
+        repos = []
+        for i in range(1, issues + 1):
+            repo = os.path.join(path, f"repo-{i}")
+            os.makedirs(repo)
+            git(repo, "init", "-q", "-b", f"feat/t-{i}-load-test")
+            repos.append(repo)
+        env = {
+            **GIT_ENV,
+            "PYTHONPATH": REPO_ROOT,
+            "LINEAR_API_KEY": "API_KEY",
+            "LINEAR_API_URL": server.url,
+            "GIT_HOOKS_CACHE_DIR": os.path.join(path, "cache"),
+            "GIT_HOOKS_LINEAR_TIMEOUT_MS": str(timeout_ms),
+        }
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda n: run_hook(path, n, repos[n % issues], env, shared_cache),
+                    range(runs),
+                )
+            )
+        elapsed = time.perf_counter() - start
+
+        counts = Counter(outcome for _, outcome in outcomes)
+        results["seconds"] = elapsed
+        results["runs_per_s"] = runs / elapsed
+        results["latency"] = percentiles([seconds for seconds, _ in outcomes])
+        results["outcomes"] = {
+            outcome: {"count": counts[outcome], "rate": counts[outcome] / runs}
+            for outcome in ("linear", "fallback", "failed")
+        }
+        results["server"] = {
+            "requests": server.requests,
+            "errors": server.errors,
+            "rate_limited": server.rate_limited,
+            "bytes_sent": server.bytes_sent,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="load_test")
+    parser.add_argument("--runs", type=int, default=200, help="hook runs in total")
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="hook runs at a time"
+    )
+    parser.add_argument(
+        "--issues",
+        type=int,
+        default=10,
+        help="distinct issues the runs are spread over",
+    )
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument(
+        "--rate-limit", type=int, help="requests the server answers per window"
+    )
+    parser.add_argument("--rate-limit-window", type=float, default=60)
+    parser.add_argument("--description-size", type=int)
+    parser.add_argument(
+        "--shared-cache",
+        action="store_true",
+        help="share one cache dir between all runs",
+    )
+    parser.add_argument(
+        "--timeout-ms",
+        type=int,
+        default=3000,
+        help="GIT_HOOKS_LINEAR_TIMEOUT_MS of the hooks",
+    )
+    args = parser.parse_args()
+    json.dump(
+        run(
+            args.runs,
+            args.concurrency,
+            args.issues,
+            args.latency_ms,
+            args.error_rate,
+            args.rate_limit,
+            args.rate_limit_window,
+            args.description_size,
+            args.shared_cache,
+            args.timeout_ms,
+        ),
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
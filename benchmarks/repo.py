@@ -0,0 +1,45 @@
+"""Helpers to create synthetic git histories for benchmarks using git fast-import."""
+
+import os
+import subprocess
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def git(path: str, *args: str) -> str:
+    return subprocess.check_output(
+        ["git", *args], cwd=path, env=GIT_ENV, text=True
+    ).strip()
+
+
+def commit_message(i: int, invalid_every: int) -> str:
+    if invalid_every and i % invalid_every == 0:
+        return f"Update module {i}\n\nSome details about change {i}.\n"
+    return (
+        f"T-{i % 99999 + 1}/feat: Update module {i}\n\nSome details about change {i}.\n"
+    )
+
+
+def synthetic_history(
+    path: str, commits: int, ref: str = "refs/heads/main", invalid_every: int = 0
+) -> None:
+    if not os.path.exists(os.path.join(path, ".git")):
+        os.makedirs(path, exist_ok=True)
+        git(path, "init", "-q", "-b", "main")
+    process = subprocess.Popen(
+        ["git", "fast-import", "--quiet"], stdin=subprocess.PIPE, cwd=path, env=GIT_ENV
+    )
+    assert process.stdin is not None
+    for i in range(commits):
+        message = commit_message(i, invalid_every).encode()
+        process.stdin.write(
+            b"commit %s\ncommitter Bench <bench@example.com> %d +0000\ndata %d\n%s\n"
+            % (ref.encode(), 1700000000 + i, len(message), message)
+        )
+    process.stdin.close()
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
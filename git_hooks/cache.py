@@ -0,0 +1,269 @@
+"""Persistent on-disk cache of Linear issue data shared by all
+repositories and worktrees.
+Each issue is stored as a small JSON file under the user cache dir (see
+cache_dir). Entries expire after GIT_HOOKS_CACHE_TTL seconds and the
+least recently used entries are evicted once there are more than
+GIT_HOOKS_CACHE_SIZE of them. Set GIT_HOOKS_CACHE=off to bypass the cache
+or GIT_HOOKS_CACHE=refresh to ignore stored entries and fetch them again.
+With GIT_HOOKS_CACHE_MAX_STALE set, expired entries younger than that many
+seconds are still used by prepare-commit-msg, which refreshes them in the
+background (stale-while-revalidate) so that commits never wait for Linear once
+an issue has been seen; older entries are fetched again before committing.
+Lookups that Linear answers with an unknown issue, an issue the API key cannot
+access or a rejected key are remembered for the shorter GIT_HOOKS_NEGATIVE_CACHE_TTL
+seconds, per issue and fingerprint of the API key, so that commits on such a branch
+do not query Linear again and a new key is tried right away.
+Concurrent hooks never see partial entries: files are written to a
+temporary name and atomically renamed into place, and unreadable or
+vanished entries are treated as cache misses.
+Hooks that miss the same issue at the same time, e.g. during `git rebase -x` or in
+parallel worktrees, coalesce into a single fetch: the fetch happens while holding
+lock(issue), and the others wait for the lock and then find the entry it stored.
+Lock files that no process holds are removed along with evicted or cleared entries.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator
+
+LOCK_POLL_INTERVAL = 0.01
+
+CACHE_TTL = int(os.environ.get("GIT_HOOKS_CACHE_TTL", 24 * 60 * 60))
+CACHE_SIZE = int(os.environ.get("GIT_HOOKS_CACHE_SIZE", 512))
+CACHE_MODE = os.environ.get("GIT_HOOKS_CACHE", "on").lower()
+CACHE_MAX_STALE = int(os.environ.get("GIT_HOOKS_CACHE_MAX_STALE", 0))
+NEGATIVE_CACHE_TTL = int(os.environ.get("GIT_HOOKS_NEGATIVE_CACHE_TTL", 10 * 60))
+
+
+def cache_dir() -> str:
+    if path := os.environ.get("GIT_HOOKS_CACHE_DIR"):
+        return path
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    elif sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "git-hooks")
+
+
+def issues_dir() -> str:
+    return os.path.join(cache_dir(), "issues")
+
+
+def entry_path(issue: str) -> str:
+    return os.path.join(issues_dir(), f"{issue.upper()}.json")
+
+
+def errors_dir() -> str:
+    return os.path.join(cache_dir(), "errors")
+
+
+def error_path(issue: str, fingerprint: str) -> str:
+    return os.path.join(errors_dir(), f"{issue.upper()}-{fingerprint}.json")
+
+
+def locks_dir() -> str:
+    return os.path.join(cache_dir(), "locks")
+
+
+def lock_path(name: str) -> str:
+    # Lock files live apart from the entries so that removing entries
+    # never removes a lock, see remove_unheld_locks() for those
+    return os.path.join(locks_dir(), f"{name.upper()}.lock")
+
+
+@contextlib.contextmanager
+def lock(name: str, timeout: float) -> Iterator[bool]:
+    # Holds an exclusive lock on name (an issue or other shared state)
+    # across processes, or yields False after waiting timeout seconds for it
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on Windows, concurrent hooks fetch independently there
+        yield False
+        return
+    path = lock_path(name)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            yield False
+            return
+        try:
+            while True:
+                try:
+                    # The lock is released by the kernel when the holder
+                    # exits, even if it is killed
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(LOCK_POLL_INTERVAL)
+            # remove_unheld_locks() may have removed the file after it was
+            # opened, the lock is then taken on the file now in its place
+            if same_file(fd, path):
+                yield True
+                return
+        finally:
+            os.close(fd)
+
+
+def same_file(fd: int, path: str) -> bool:
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+
+def remove_unheld_locks() -> None:
+    # Every name ever locked leaves a file behind, remove those that no
+    # process holds
+    try:
+        import fcntl
+    except ImportError:
+        return
+    try:
+        entries = list(os.scandir(locks_dir()))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            fd = os.open(entry.path, os.O_RDWR)
+        except OSError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if same_file(fd, entry.path):
+                os.remove(entry.path)
+        except OSError:
+            # Held by another hook, or removed by one already
+            pass
+        finally:
+            os.close(fd)
+
+
+def write_json(path: str, data: dict) -> None:
+    # Write to a unique temporary file first so that readers only ever
+    # see complete files
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str) -> dict | None:
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def get(issue: str, max_age: float | None = None) -> dict[str, str] | None:
+    # Entries older than max_age seconds (default GIT_HOOKS_CACHE_TTL) are misses
+    if CACHE_MODE in ("off", "refresh"):
+        return None
+    path = entry_path(issue)
+    if (entry := read_json(path)) is None:
+        return None
+    if time.time() - entry.get("fetched_at", 0) > (
+        CACHE_TTL if max_age is None else max_age
+    ):
+        return None
+    # Touch the entry so that eviction removes the least recently used ones first
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry.get("data")
+
+
+def put(issue: str, data: dict[str, str]) -> None:
+    if CACHE_MODE == "off":
+        return
+    try:
+        write_json(entry_path(issue), {"fetched_at": time.time(), "data": data})
+        evict()
+    except OSError:
+        # The cache is an optimisation, never fail the hook because of it
+        pass
+
+
+def get_error(issue: str, fingerprint: str) -> list[str] | None:
+    # The messages of the error Linear answered a lookup of the issue
+    # with, using the key with this fingerprint
+    if CACHE_MODE in ("off", "refresh"):
+        return None
+    path = error_path(issue, fingerprint)
+    if (entry := read_json(path)) is None:
+        return None
+    if time.time() - entry.get("failed_at", 0) > NEGATIVE_CACHE_TTL:
+        # Expired errors are removed as they are found, there is no
+        # eviction for them otherwise
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return entry.get("messages")
+
+
+def put_error(issue: str, fingerprint: str, messages: list[str]) -> None:
+    if CACHE_MODE == "off":
+        return
+    try:
+        write_json(
+            error_path(issue, fingerprint),
+            {"failed_at": time.time(), "messages": messages},
+        )
+    except OSError:
+        pass
+
+
+def evict(size: int | None = None) -> None:
+    size = CACHE_SIZE if size is None else size
+    try:
+        entries = list(os.scandir(issues_dir()))
+    except OSError:
+        return
+    entries = [e for e in entries if e.name.endswith(".json")]
+    if len(entries) <= size:
+        return
+
+    def last_used(entry: os.DirEntry) -> float:
+        try:
+            return entry.stat().st_mtime
+        except OSError:
+            return 0.0
+
+    for entry in sorted(entries, key=last_used)[: len(entries) - size]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            # Another hook may have evicted it already
+            pass
+    remove_unheld_locks()
+
+
+def clear() -> None:
+    for path in (issues_dir(), errors_dir()):
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    remove_unheld_locks()
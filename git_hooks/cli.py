@@ -0,0 +1,174 @@
+"""Command line interface for git-hooks tooling that does not run as a git hook itself.
+git-hooks daemon    serve the hooks from a long-lived process (see daemon.py)
+git-hooks prefetch  fetch Linear issues into the cache in batches
+git-hooks sync      pull the issues of the configured teams into a local index
+git-hooks rewrite   rewrite existing commit messages to the expected format
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+def run_daemon(args: argparse.Namespace) -> int:
+    from git_hooks import daemon
+
+    daemon.serve(args.socket, args.idle_timeout)
+    return 0
+
+
+def run_prefetch(args: argparse.Namespace) -> int:
+    from git_hooks import cache
+    from git_hooks import prepare_commit_msg
+
+    if not prepare_commit_msg.LINEAR_API_KEY:
+        print("LINEAR_API_KEY is not set.", file=sys.stderr)
+        return 1
+    issues = [issue.upper() for issue in args.issues]
+    if args.branches:
+        branches = subprocess.check_output(
+            ["git", "for-each-ref", "--format=%(refname:short)", "refs/heads"],
+            text=True,
+        ).split()
+        issues += [
+            issue
+            for branch in branches
+            if (issue := prepare_commit_msg.extract_branch_data(branch)["issue"])
+        ]
+    missing = [issue for issue in dict.fromkeys(issues) if cache.get(issue) is None]
+    try:
+        linear_issues = prepare_commit_msg.retrieve_linear_issues(missing)
+    except Exception as exception:
+        # e.g. a rejected API key, which fails every issue
+        print(f"Prefetch failed: {exception}", file=sys.stderr)
+        return 1
+    for issue, linear_issue in linear_issues.items():
+        cache.put(issue, linear_issue)
+    print(
+        f"Fetched {len(linear_issues)} of {len(missing)} uncached issues.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def run_sync(args: argparse.Namespace) -> int:
+    from git_hooks import common
+    from git_hooks import index
+    from git_hooks import prepare_commit_msg
+
+    if not prepare_commit_msg.LINEAR_API_KEY:
+        print("LINEAR_API_KEY is not set.", file=sys.stderr)
+        return 1
+    stats = index.sync(args.teams or common.teams, full=args.full)
+    print(
+        f"Synced {stats['issues']} issues in {stats['pages']} pages.", file=sys.stderr
+    )
+    return 0
+
+
+def run_rewrite(args: argparse.Namespace) -> int:
+    from git_hooks import prepare_commit_msg
+    from git_hooks import rewrite
+
+    if args.linear and not prepare_commit_msg.LINEAR_API_KEY:
+        print("LINEAR_API_KEY is not set.", file=sys.stderr)
+        return 1
+    try:
+        issue_map = rewrite.read_issue_map(args.map) if args.map else None
+        stats = rewrite.rewrite(
+            args.revisions, args.branch, issue_map, args.linear, args.dry_run
+        )
+    except (OSError, ValueError, subprocess.CalledProcessError) as exception:
+        print(f"Rewrite failed: {exception}", file=sys.stderr)
+        return 1
+    action = "Would rewrite" if args.dry_run else "Rewrote"
+    print(
+        f"{action} {stats['rewritten']} of {stats['commits']} commits.", file=sys.stderr
+    )
+    if stats["refs"]:
+        print(
+            f"The previous tips of {stats['refs']} refs are kept under refs/original/.",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="git-hooks")
+    subparsers = parser.add_subparsers(required=True)
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="serve the hooks from a long-lived process"
+    )
+    daemon_parser.add_argument("--socket", help="Unix domain socket to listen on")
+    daemon_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        help="seconds without requests after which the daemon exits",
+    )
+    daemon_parser.set_defaults(func=run_daemon)
+
+    prefetch_parser = subparsers.add_parser(
+        "prefetch", help="fetch Linear issues into the cache in batches"
+    )
+    prefetch_parser.add_argument(
+        "issues", nargs="*", help="issue references, e.g. T-1234"
+    )
+    prefetch_parser.add_argument(
+        "--branches",
+        action="store_true",
+        help="also fetch the issues of all local branches",
+    )
+    prefetch_parser.set_defaults(func=run_prefetch)
+
+    sync_parser = subparsers.add_parser(
+        "sync", help="pull the issues of the configured teams into a local index"
+    )
+    sync_parser.add_argument(
+        "--team",
+        dest="teams",
+        action="append",
+        help="team key to sync instead of the configured teams",
+    )
+    sync_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="fetch every issue again instead of only the updated ones",
+    )
+    sync_parser.set_defaults(func=run_sync)
+
+    rewrite_parser = subparsers.add_parser(
+        "rewrite", help="rewrite existing commit messages to the expected format"
+    )
+    rewrite_parser.add_argument(
+        "revisions",
+        nargs="*",
+        help="revisions to rewrite as for git fast-export "
+        "(default: the commits of the current branch not on its upstream)",
+    )
+    rewrite_parser.add_argument(
+        "--branch",
+        help="take the issue and commit type from this branch name "
+        "instead of the rewritten one",
+    )
+    rewrite_parser.add_argument(
+        "--map", help="file with lines of <commit> <issue or branch>"
+    )
+    rewrite_parser.add_argument(
+        "--linear",
+        action="store_true",
+        help="fetch the issues from Linear first and only use those that exist",
+    )
+    rewrite_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the new titles without rewriting anything",
+    )
+    rewrite_parser.set_defaults(func=run_rewrite)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
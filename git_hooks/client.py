@@ -0,0 +1,65 @@
+"""Thin client the hooks use to hand work to a running daemon (see git_hooks/daemon.py).
+Requests and responses are single JSON documents, one per connection. Every function
+returns None when the daemon is not running or fails, in which case the hook does
+the work in-process. Requests carry the teams and commit types of the repository
+(see git_hooks/config.py), which the daemon refuses when they differ from its own.
+"""
+
+import json
+import os
+
+from git_hooks import cache
+from git_hooks import common
+
+DAEMON_TIMEOUT = float(os.environ.get("GIT_HOOKS_DAEMON_TIMEOUT", 10))
+
+
+def socket_path() -> str:
+    return os.environ.get("GIT_HOOKS_DAEMON_SOCKET") or os.path.join(
+        cache.cache_dir(), "daemon.sock"
+    )
+
+
+def config() -> dict:
+    return {"teams": common.teams, "commit_types": common.commit_types}
+
+
+def request(payload: dict, path: str | None = None) -> dict | None:
+    # Checking for the socket first keeps the cost of an absent daemon
+    # to a single stat call
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(DAEMON_TIMEOUT)
+            client.connect(path)
+            client.sendall(json.dumps({**payload, "config": config()}).encode())
+            client.shutdown(socket.SHUT_WR)
+            response = b""
+            while chunk := client.recv(1 << 16):
+                response += chunk
+        reply = json.loads(response)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict) or "error" in reply:
+        return None
+    return reply
+
+
+def prepare_commit_msg_title(
+    raw_commit_msg_title: str, branch: str, edit_mode: bool
+) -> tuple[str, list[str], list[str]] | None:
+    reply = request(
+        {
+            "hook": "prepare-commit-msg",
+            "raw_commit_msg_title": raw_commit_msg_title,
+            "branch": branch,
+            "edit_mode": edit_mode,
+        }
+    )
+    if not reply or "title" not in reply:
+        return None
+    return reply["title"], reply["header_lines"], reply["footer_lines"]
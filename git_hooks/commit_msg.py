@@ -2,12 +2,17 @@
 The commit message needs to conform to <linear issue>/<conventional commit type>[!]: <title>. e.g.
     T-5482/feat: Amazing new commit-msg hook
 See https://www.conventionalcommits.org for examples of conventional commit types.
+With --range <revision range> (e.g. commit-msg --range origin/main..HEAD),
+it validates every commit in the range instead, streaming the messages
+from a single git log process, and reports the offending commits.
 """
 
 import sys
-import re
+import subprocess
+from collections.abc import Iterable, Iterator
 
 from git_hooks import common
+from git_hooks import tracing
 
 ERRC = "\033[91m"
 ENDC = "\033[0m"
@@ -28,13 +33,154 @@ See https://github.com/two-inc/git-hooks/blob/26.03.10/README.md for more info.
 
 
 def get_exit_code(commit_msg) -> int:
-    return 0 if re.match(common.valid_commit_regex, commit_msg) else 1
+    return 0 if common.parse_commit_msg_title(commit_msg).valid else 1
+
+
+def get_error(commit_msg: str) -> str:
+    title = common.parse_commit_msg_title(commit_msg)
+    return f"{ERRC}{common.commit_msg_title_errors[title.error]}{ENDC}\n{error}"
+
+
+def iter_commits(
+    rev_args: list[str], cwd: str | None = None
+) -> Iterator[tuple[str, str]]:
+    # Stream (sha, title) pairs from a single git log process; records
+    # are NUL separated with -z
+    process = subprocess.Popen(
+        ["git", "log", "-z", "--format=%H%n%B", *rev_args],
+        stdout=subprocess.PIPE,
+        cwd=cwd,
+    )
+    assert process.stdout is not None
+    remainder = b""
+    try:
+        while chunk := process.stdout.read(1 << 20):
+            records = (remainder + chunk).split(b"\0")
+            remainder = records.pop()
+            for record in records:
+                sha, _, commit_msg = record.partition(b"\n")
+                yield (
+                    sha.decode(),
+                    commit_msg.split(b"\n", 1)[0].decode(errors="replace"),
+                )
+        if remainder:
+            sha, _, commit_msg = remainder.partition(b"\n")
+            yield sha.decode(), commit_msg.split(b"\n", 1)[0].decode(errors="replace")
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+
+
+def find_invalid_commits(commits: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    valid_commit = common.valid_commit_pattern.match
+    return [(sha, title) for sha, title in commits if not valid_commit(title)]
+
+
+def iter_invalid_commits(
+    commits: Iterable[tuple[str, str]], jobs: int = 1, chunk_size: int = 10000
+) -> Iterator[tuple[str, str]]:
+    chunks = iter_chunks(commits, chunk_size)
+    if jobs <= 1:
+        for chunk in chunks:
+            yield from find_invalid_commits(chunk)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Chunks are submitted as results are consumed rather than all up front
+    # like executor.map does, so that at most two chunks per worker are held
+    # in memory however long the history is
+    with ProcessPoolExecutor(jobs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(find_invalid_commits, chunk))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def format_invalid_commit(sha: str, title: str) -> str:
+    reason = common.commit_msg_title_errors[common.parse_commit_msg_title(title).error]
+    return f"{sha[:12]} {title}\n\t{reason}"
+
+
+def range_main(args: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="commit-msg")
+    parser.add_argument(
+        "--range",
+        required=True,
+        help="revision range to validate, e.g. origin/main..HEAD",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="number of worker processes"
+    )
+    parsed = parser.parse_args(args)
+
+    count = 0
+
+    def counted(commits: Iterable[tuple[str, str]]) -> Iterator[tuple[str, str]]:
+        nonlocal count
+        for commit in commits:
+            count += 1
+            yield commit
+
+    invalid = 0
+    try:
+        for sha, title in iter_invalid_commits(
+            counted(iter_commits([parsed.range])), parsed.jobs
+        ):
+            invalid += 1
+            print(format_invalid_commit(sha, title), file=sys.stderr)
+    except subprocess.CalledProcessError:
+        # git log already explained what is wrong with the range
+        print(
+            f"{ERRC}Could not list the commits in {parsed.range}.{ENDC}",
+            file=sys.stderr,
+        )
+        return 1
+    if invalid:
+        print(
+            f"{ERRC}{invalid} of {count} commits in {parsed.range} are invalid.{ENDC}",
+            file=sys.stderr,
+        )
+        print(error, file=sys.stderr)
+        return 1
+    print(
+        f"All {count} commits in {parsed.range} are valid. {success}", file=sys.stderr
+    )
+    return 0
 
 
 def main():
-    commit_msg = open(sys.argv[1], "r").read()
-    exit_code = get_exit_code(commit_msg)
-    print(success if exit_code == 0 else error, file=sys.stderr)
+    if len(sys.argv) > 1 and sys.argv[1].startswith("--"):
+        sys.exit(range_main(sys.argv[1:]))
+    tracing.record_startup()
+    try:
+        with tracing.span("commit-msg"):
+            # Only the title is validated, so the rest of a large message is never read
+            with tracing.span("read_commit_msg"):
+                with open(sys.argv[1], "r") as fh:
+                    commit_msg = fh.readline()
+            with tracing.span("validate"):
+                exit_code = get_exit_code(commit_msg)
+            print(success if exit_code == 0 else get_error(commit_msg), file=sys.stderr)
+    finally:
+        tracing.flush()
     sys.exit(exit_code)
 
 
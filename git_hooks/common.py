@@ -1,4 +1,9 @@
-commit_types: dict[str, str] = {
+import re
+from collections import namedtuple
+
+from git_hooks import config
+
+default_commit_types: dict[str, str] = {
     "build": "updating build configuration, development tools",
     "chore": "updating grunt tasks etc.",
     "ci": "updating deployment configuration",
@@ -13,47 +18,141 @@ commit_types: dict[str, str] = {
     "style": "formatting changes, missing semicolons, etc.",
     "test": "for adding missing tests, refactoring tests; no production code change",
 }
+default_teams: list[str] = ["T", "L2", "DAE", "PDEV"]
+generic_team_regex: str = r"[A-Z]{1,4}"
 
-commit_types_title: str = "Valid conventional commit types are:"
-commit_types_block: str = "\t" + "\n\t".join(
-    [f"{k.ljust(10)}{v}" for k, v in commit_types.items()]
-)
-commit_types_doc: str = f"""
-{commit_types_title}
-
-{commit_types_block}
-"""
-commit_types_doc_commented: str = "\n".join(
-    [
-        f"# {commit_types_title}",
-        "#" + commit_types_block.replace("\n", "\n#"),
+
+def build_settings(
+    teams: list[str] = default_teams,
+    commit_types: dict[str, str] = default_commit_types,
+) -> dict:
+    # Everything derived from the configuration, as plain data so that
+    # git_hooks/config.py can cache it on disk
+    commit_types_title = "Valid conventional commit types are:"
+    commit_types_block = "\t" + "\n\t".join(
+        [f"{k.ljust(10)}{v}" for k, v in commit_types.items()]
+    )
+    commit_type_regex = f"(?:{'|'.join(re.escape(k) for k in commit_types)})"
+    # Teams that the generic alternatives match anyway only make the
+    # patterns slower to compile and to match
+    named_teams = [
+        re.escape(t) for t in teams if not re.fullmatch(generic_team_regex, t)
     ]
-)
-
-commit_type_regex: str = f"(?:{'|'.join(commit_types.keys())})"
-teams: list[str] = [
-    "T",
-    "L2",
-    "DAE",
-    "PDEV"
-]
-linear_ref: str = (
-    "(?:"
-    f"{'|'.join(t for t in teams)}"
-    "|"
-    r"[A-Z]{1,4}"
-    "|"
-    f"{'|'.join(t.lower() for t in teams)}"
-    "|"
-    r"[a-z]{1,4}"
-    ")-[0-9]{1,5}"
-)
-valid_commit_regex: str = (
-    f"^{linear_ref}/{commit_type_regex}!?: |Merge .+|Revert .+|Bump version .+"
-)
-partial_branch_regex: str = f"({linear_ref})[-|_](.*)"
-branch_regex: str = f"^(.*)/{partial_branch_regex}"
-commit_msg_title_regex: str = f"^({commit_type_regex}!?):? (.*)"
-commit_msg_issue_regex: str = f"^({linear_ref})/(.*)"
-issue_regex: str = f"^{linear_ref}$"
-prefix_regex: str = f"^({commit_type_regex})"
+    linear_ref = (
+        "(?:"
+        + "".join(f"{t}|" for t in named_teams)
+        + generic_team_regex
+        + "|"
+        + "".join(f"{t.lower()}|" for t in named_teams)
+        + generic_team_regex.lower()
+        + ")-[0-9]{1,5}"
+    )
+    return {
+        "teams": teams,
+        "commit_types": commit_types,
+        "commit_types_title": commit_types_title,
+        "commit_types_block": commit_types_block,
+        "commit_types_doc": f"\n{commit_types_title}\n\n{commit_types_block}\n",
+        "commit_types_doc_commented": "\n".join(
+            [
+                f"# {commit_types_title}",
+                "#" + commit_types_block.replace("\n", "\n#"),
+            ]
+        ),
+        "commit_type_regex": commit_type_regex,
+        "linear_ref": linear_ref,
+        "valid_commit_regex": (
+            f"^{linear_ref}/{commit_type_regex}!?: |Merge .+|Revert .+|Bump version .+"
+        ),
+        "partial_branch_regex": f"({linear_ref})[-|_](.*)",
+        "branch_regex": f"^(.*)/({linear_ref})[-|_](.*)",
+        "commit_msg_title_regex": f"^({commit_type_regex}!?):? (.*)",
+        "commit_msg_issue_regex": f"^({linear_ref})/(.*)",
+        "issue_regex": f"^{linear_ref}$",
+        "prefix_regex": f"^({commit_type_regex})",
+        "branch_pattern": (
+            f"^(?:(?P<prefix>.*)/)?(?P<issue>{linear_ref})[-|_](?P<title>.*)"
+        ),
+        "commit_msg_title_pattern": (
+            "^(?:"
+            "(?P<special>(?:Merge|Revert|Bump version) .+)"
+            "|"
+            f"(?:(?P<issue>{linear_ref})/)?"
+            f"(?:(?P<commit_type>{commit_type_regex})(?P<breaking>!)?(?P<colon>:)? )?"
+            "(?P<title>.*)"
+            ")"
+        ),
+    }
+
+
+# Teams and commit types of the current repository, see git_hooks/config.py
+settings: dict = config.load(build_settings)
+
+commit_types: dict[str, str] = settings["commit_types"]
+teams: list[str] = settings["teams"]
+commit_types_title: str = settings["commit_types_title"]
+commit_types_block: str = settings["commit_types_block"]
+commit_types_doc: str = settings["commit_types_doc"]
+commit_types_doc_commented: str = settings["commit_types_doc_commented"]
+
+commit_type_regex: str = settings["commit_type_regex"]
+linear_ref: str = settings["linear_ref"]
+valid_commit_regex: str = settings["valid_commit_regex"]
+partial_branch_regex: str = settings["partial_branch_regex"]
+branch_regex: str = settings["branch_regex"]
+commit_msg_title_regex: str = settings["commit_msg_title_regex"]
+commit_msg_issue_regex: str = settings["commit_msg_issue_regex"]
+issue_regex: str = settings["issue_regex"]
+prefix_regex: str = settings["prefix_regex"]
+
+# Precompiled single-pass patterns shared by both hooks
+valid_commit_pattern: re.Pattern = re.compile(valid_commit_regex)
+prefix_pattern: re.Pattern = re.compile(prefix_regex)
+branch_pattern: re.Pattern = re.compile(settings["branch_pattern"])
+commit_msg_title_pattern: re.Pattern = re.compile(settings["commit_msg_title_pattern"])
+
+commit_msg_title_errors: dict[str, str] = {
+    "issue": (
+        "The title does not start with a reference to a Linear issue, e.g. T-5482/"
+    ),
+    "type": (
+        "The Linear issue reference is not followed by a conventional commit type, "
+        "e.g. T-5482/feat: "
+    ),
+    "colon": (
+        "The conventional commit type is not followed by a colon, e.g. T-5482/feat: "
+    ),
+}
+
+
+class CommitMsgTitle(
+    namedtuple("CommitMsgTitle", ["issue", "commit_type", "breaking", "title", "error"])
+):
+    """Components of a commit message title. error names the first missing
+    component (see commit_msg_title_errors) and is empty when the title is valid."""
+
+    __slots__ = ()
+
+    @property
+    def valid(self) -> bool:
+        return not self.error
+
+
+def parse_commit_msg_title(commit_msg: str) -> CommitMsgTitle:
+    # Only the first line of commit_msg is considered
+    match = commit_msg_title_pattern.match(commit_msg)
+    assert match is not None
+    if special := match.group("special"):
+        return CommitMsgTitle("", "", False, special, "")
+    issue = (match.group("issue") or "").upper()
+    commit_type = match.group("commit_type") or ""
+    error = ""
+    if not issue:
+        error = "issue"
+    elif not commit_type:
+        error = "type"
+    elif not match.group("colon"):
+        error = "colon"
+    return CommitMsgTitle(
+        issue, commit_type, bool(match.group("breaking")), match.group("title"), error
+    )
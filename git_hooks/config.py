@@ -0,0 +1,114 @@
+"""Per-repository configuration of the Linear teams and conventional commit types
+accepted by the hooks. It is read from .git-hooks.toml or the [tool.git-hooks] table
+of pyproject.toml, whichever is found first walking up from the current directory to
+the root of the repository, or from the file named by GIT_HOOKS_CONFIG, e.g.
+
+    [tool.git-hooks]
+    teams = ["T", "L2", "PLATFORM"]
+    commit-types = { feat = "adding a new feature", fix = "patching a bug" }
+
+Both keys are optional and replace the defaults in git_hooks/common.py.
+The patterns built from a configuration are stored in the cache dir (see
+git_hooks/cache.py), keyed by a hash of the configuration file and of
+the code that builds them, so that TOML is only parsed and the patterns
+are only built again when either changes.
+"""
+
+import marshal
+import os
+import zlib
+from collections.abc import Callable
+
+CONFIG_FILE = ".git-hooks.toml"
+PYPROJECT_TABLE = b"tool.git-hooks"
+
+
+def find_config_file(path: str | None = None) -> str | None:
+    if config_file := os.environ.get("GIT_HOOKS_CONFIG"):
+        return config_file
+    path = os.path.abspath(path or os.getcwd())
+    while True:
+        if os.path.isfile(candidate := os.path.join(path, CONFIG_FILE)):
+            return candidate
+        candidate = os.path.join(path, "pyproject.toml")
+        try:
+            with open(candidate, "rb") as fh:
+                # Most pyproject.toml files have no table for us, which
+                # is cheaper to tell without parsing them
+                if PYPROJECT_TABLE in fh.read():
+                    return candidate
+        except OSError:
+            pass
+        # Stop at the root of the repository
+        if (
+            os.path.exists(os.path.join(path, ".git"))
+            or (parent := os.path.dirname(path)) == path
+        ):
+            return None
+        path = parent
+
+
+def parse_config(content: bytes, path: str) -> dict:
+    try:
+        import tomllib
+    except ImportError:
+        import tomli as tomllib
+
+    try:
+        data = tomllib.loads(content.decode())
+    except (UnicodeDecodeError, tomllib.TOMLDecodeError) as exception:
+        raise ValueError(f"Invalid configuration in {path}: {exception}") from None
+    if os.path.basename(path) == "pyproject.toml":
+        data = data.get("tool", {}).get("git-hooks", {})
+    config = {}
+    if "teams" in data:
+        teams = data["teams"]
+        if not isinstance(teams, list) or not all(
+            isinstance(team, str) and team for team in teams
+        ):
+            raise ValueError(
+                f"Invalid configuration in {path}: teams must be a list of team keys"
+            )
+        config["teams"] = teams
+    if "commit-types" in data:
+        commit_types = data["commit-types"]
+        if not isinstance(commit_types, dict) or not all(
+            isinstance(description, str) for description in commit_types.values()
+        ):
+            raise ValueError(
+                f"Invalid configuration in {path}: "
+                "commit-types must map commit types to descriptions"
+            )
+        config["commit_types"] = commit_types
+    return config
+
+
+def load(build: Callable[..., dict], path: str | None = None) -> dict:
+    # Returns build(**config) for the configuration of the current
+    # repository, from the cache when possible
+    if (config_file := find_config_file(path)) is None:
+        return build()
+    from git_hooks import cache
+
+    with open(config_file, "rb") as fh:
+        content = fh.read()
+    key = zlib.crc32(marshal.dumps((build.__code__, build.__defaults__)))
+    key = zlib.crc32(os.path.basename(config_file).encode(), key)
+    key = zlib.crc32(content, key)
+    cache_path = os.path.join(cache.cache_dir(), "config", f"{key:08x}.marshal")
+    try:
+        with open(cache_path, "rb") as fh:
+            return marshal.load(fh)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    result = build(**parse_config(content, config_file))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            marshal.dump(result, fh)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return result
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Keep the Linear issue cache of the developer running the tests out of the way
+    path = tmp_path / "cache"
+    monkeypatch.setenv("GIT_HOOKS_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def import_time():
+    # Returns a function that imports a module in a fresh interpreter
+    # with -X importtime and reports the cumulative import time of that
+    # module in milliseconds along with every module it pulled in
+    def run(module: str) -> tuple[float, set[str]]:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative) / 1000
+        return imported[module], set(imported)
+
+    return run
+
+
+@pytest.fixture
+def import_budget_ms() -> float:
+    # Budget for the import cost of each hook entry point, paid on every commit
+    return float(os.environ.get("GIT_HOOKS_IMPORT_BUDGET_MS", 50))
+
+
+class GitRepo:
+    def __init__(self, path):
+        self.path = path
+
+    def git(self, *args: str) -> str:
+        return subprocess.check_output(["git", *args], cwd=self.path, text=True).strip()
+
+    def commit(self, message: str) -> str:
+        self.git("commit", "--allow-empty", "--no-verify", "-q", "-m", message)
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    for name in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{name}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{name}_EMAIL", "test@example.com")
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    path = tmp_path / "repo"
+    path.mkdir()
+    repo = GitRepo(path)
+    repo.git("init", "-q", "-b", "main")
+    return repo
@@ -0,0 +1,102 @@
+"""Optional long-lived process that keeps git_hooks loaded and a keep-alive HTTPS
+session to Linear open. Start it with `git-hooks daemon`. It listens on a Unix
+domain socket in the cache dir (see git_hooks/cache.py) and prepares commit messages
+on behalf of the hooks (see git_hooks/client.py), which fall back to doing the work
+in-process whenever the daemon is not running or does not answer. The daemon uses
+its own environment (LINEAR_API_KEY, DEFAULT_COMMIT_TYPE, ...), not the one of the
+hook, and exits after GIT_HOOKS_DAEMON_IDLE_TIMEOUT seconds without requests. Its
+teams and commit types are those of the repository it was started in, requests from
+a repository configured differently are refused and handled by the hook itself.
+"""
+
+import json
+import os
+import socketserver
+import sys
+
+from git_hooks import client
+from git_hooks import commit_msg
+from git_hooks import prepare_commit_msg
+
+DAEMON_IDLE_TIMEOUT = float(os.environ.get("GIT_HOOKS_DAEMON_IDLE_TIMEOUT", 60 * 60))
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            reply = self.dispatch(json.loads(self.rfile.read()))
+        except Exception as exception:
+            reply = {"error": str(exception)}
+        self.wfile.write(json.dumps(reply).encode())
+
+    def dispatch(self, payload: dict) -> dict:
+        hook = payload.get("hook")
+        if hook != "ping" and payload.get("config") != self.server.config:
+            raise ValueError("The repository is configured differently from the daemon")
+        if hook == "prepare-commit-msg":
+            title, header_lines, footer_lines = (
+                prepare_commit_msg.prepare_commit_msg_title(
+                    payload["raw_commit_msg_title"],
+                    payload["branch"],
+                    payload["edit_mode"],
+                )
+            )
+            return {
+                "title": title,
+                "header_lines": header_lines,
+                "footer_lines": footer_lines,
+            }
+        if hook == "commit-msg":
+            return {"exit_code": commit_msg.get_exit_code(payload["commit_msg"])}
+        if hook == "ping":
+            return {"pid": os.getpid()}
+        raise ValueError(f"Unknown hook: {hook}")
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, idle_timeout: float | None = None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            # A live daemon answers; otherwise the socket was left
+            # behind by one that died
+            if client.request({"hook": "ping"}, path) is not None:
+                raise RuntimeError(f"Daemon is already running on {path}")
+            os.remove(path)
+        umask = os.umask(0o077)
+        try:
+            super().__init__(path, Handler)
+        finally:
+            os.umask(umask)
+        self.timeout = idle_timeout
+        self.idle = False
+        # The settings of git_hooks/common.py are built once, when the daemon starts
+        self.config = json.loads(json.dumps(client.config()))
+
+    def handle_timeout(self):
+        self.idle = True
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+
+def serve(path: str | None = None, idle_timeout: float | None = None) -> None:
+    # Connect once so that every lookup reuses the same pooled keep-alive session
+    if prepare_commit_msg.LINEAR_API_KEY:
+        prepare_commit_msg.linear_session = (
+            prepare_commit_msg.linear_client().connect_sync()
+        )
+    server = Server(path or client.socket_path(), idle_timeout or DAEMON_IDLE_TIMEOUT)
+    print(f"Listening on {server.server_address}", file=sys.stderr)
+    try:
+        while not server.idle:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
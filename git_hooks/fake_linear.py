@@ -0,0 +1,355 @@
+"""Local stand-in for the Linear GraphQL API used by tests and benchmarks.
+Queries are executed against the bundled schema snapshot (see
+git_hooks/linear_schema.py) over an in-memory set of issues, so the hooks can be
+exercised without network access. Request counts and bytes transferred are
+recorded on the server. With rate_limit, at most that many requests are answered
+per rate_limit_window seconds and the others get HTTP 429 with a RATELIMITED
+error, with the rate limit headers Linear sends. A share error_rate of the
+requests fail with HTTP 500, and description_size pads every issue description
+to that many bytes, to simulate an unreliable Linear and large payloads.
+Run it standalone to point hooks at it with LINEAR_API_URL:
+Usage: python -m git_hooks.fake_linear [--port 8000] [--issues 1000] [--latency-ms 50]
+    [--error-rate 0.05] ...
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from graphql import build_schema, graphql_sync
+
+from git_hooks.linear_schema import LINEAR_SCHEMA
+
+
+class Root:
+    def __init__(self, server: "FakeLinearServer"):
+        self.server = server
+
+    def issue(self, info, id: str) -> dict:
+        if (issue := self.server.issues.get(id.upper())) is None:
+            raise Exception("Entity not found: Issue")
+        if self.server.description_size is not None:
+            return {
+                **issue,
+                "description": self.server.padded(issue["description"] or ""),
+            }
+        return issue
+
+    def issues(
+        self,
+        info,
+        first: int = 50,
+        after: str | None = None,
+        filter: dict | None = None,
+        orderBy: str = "createdAt",
+    ) -> dict:
+        filter = filter or {}
+        ordered, positions = self.server.ordered_issues(orderBy)
+        start = positions[after] + 1 if after else 0
+        updated_at = filter.get("updatedAt", {})
+        if orderBy == "updatedAt" and (
+            gt := updated_at.get("gt") or updated_at.get("gte")
+        ):
+            # Skip the issues that cannot match in one go, as paginating
+            # 100k issues would otherwise be quadratic
+            bound = bisect.bisect_right if "gt" in updated_at else bisect.bisect_left
+            start = max(start, bound(ordered, gt, key=lambda issue: issue["updatedAt"]))
+        teams = filter.get("team", {}).get("key", {})
+        nodes = []
+        position = start
+        while position < len(ordered) and len(nodes) < first:
+            issue = ordered[position]
+            position += 1
+            if "gt" in updated_at and not issue["updatedAt"] > updated_at["gt"]:
+                continue
+            if "gte" in updated_at and not issue["updatedAt"] >= updated_at["gte"]:
+                continue
+            if "eq" in teams and issue["team"]["key"] != teams["eq"]:
+                continue
+            if "in" in teams and issue["team"]["key"] not in teams["in"]:
+                continue
+            nodes.append(issue)
+        return {
+            "nodes": nodes,
+            "pageInfo": {
+                "hasNextPage": position < len(ordered),
+                "endCursor": nodes[-1]["identifier"] if nodes else after,
+            },
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: "FakeLinearServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        request = json.loads(self.rfile.read(length))
+        allowed, rate_limit_headers = self.server.take_rate_limit()
+        if not allowed:
+            error = {
+                "message": "Rate limit exceeded",
+                "extensions": {"code": "RATELIMITED"},
+            }
+            self.send_json(429, {"errors": [error]}, rate_limit_headers)
+            return
+        if self.server.fail():
+            # Like an overloaded load balancer, not a GraphQL error,
+            # which would mean the query itself is wrong
+            body = b"Internal Server Error"
+            self.send_response(500)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        result = graphql_sync(
+            self.server.schema,
+            request["query"],
+            root_value=Root(self.server),
+            variable_values=request.get("variables"),
+            operation_name=request.get("operationName"),
+        )
+        response = {"data": result.data}
+        if result.errors:
+            response["errors"] = [error.formatted for error in result.errors]
+        body = json.dumps(response).encode()
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_received += length
+            self.server.bytes_sent += len(body)
+        self.send_json(200, response, rate_limit_headers, body)
+
+    def send_json(
+        self,
+        status: int,
+        response: dict,
+        headers: dict[str, str],
+        body: bytes | None = None,
+    ):
+        body = json.dumps(response).encode() if body is None else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeLinearServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        issues: dict[str, dict] | None = None,
+        port: int = 0,
+        latency: float = 0,
+        rate_limit: int | None = None,
+        rate_limit_window: float = 3600,
+        error_rate: float = 0,
+        description_size: int | None = None,
+        seed: int | None = None,
+    ):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.schema = build_schema(LINEAR_SCHEMA)
+        # Seconds added to every response, to simulate the round-trip time to Linear
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.window_start = time.time()
+        self.window_requests = 0
+        self.rate_limited = 0
+        self.error_rate = error_rate
+        self.description_size = description_size
+        self.random = random.Random(seed)
+        self.errors = 0
+        self.issues: dict[str, dict] = {}
+        self.ordered: dict[str, tuple[list[dict], dict[str, int]]] = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        for identifier, issue in (issues or {}).items():
+            self.add_issue(identifier, **issue)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def add_issue(
+        self,
+        identifier: str,
+        title: str,
+        description: str | None = None,
+        updated_at: str = "2024-01-01T00:00:00.000Z",
+    ):
+        identifier = identifier.upper()
+        # Adding an issue again updates it
+        self.issues[identifier] = {
+            "id": identifier,
+            "identifier": identifier,
+            "title": title,
+            "description": description,
+            "updatedAt": updated_at,
+            "team": {"key": identifier.rsplit("-", 1)[0]},
+        }
+        self.ordered.clear()
+
+    def ordered_issues(self, order_by: str) -> tuple[list[dict], dict[str, int]]:
+        # Issues in pagination order and the position of each, computed
+        # once per change to the issues
+        with self.lock:
+            if order_by not in self.ordered:
+                issues = list(self.issues.values())
+                if order_by == "updatedAt":
+                    issues.sort(
+                        key=lambda issue: (issue["updatedAt"], issue["identifier"])
+                    )
+                positions = {issue["identifier"]: n for n, issue in enumerate(issues)}
+                self.ordered[order_by] = (issues, positions)
+            return self.ordered[order_by]
+
+    def take_rate_limit(self) -> tuple[bool, dict[str, str]]:
+        # Counts a request against the current window, returns whether
+        # it is answered and the headers to send
+        if self.rate_limit is None:
+            return True, {}
+        with self.lock:
+            now = time.time()
+            if now >= self.window_start + self.rate_limit_window:
+                self.window_start = now
+                self.window_requests = 0
+            self.window_requests += 1
+            allowed = self.window_requests <= self.rate_limit
+            if not allowed:
+                self.rate_limited += 1
+            reset = self.window_start + self.rate_limit_window
+        headers = {
+            "X-RateLimit-Requests-Limit": str(self.rate_limit),
+            "X-RateLimit-Requests-Remaining": str(
+                max(0, self.rate_limit - self.window_requests)
+            ),
+            "X-RateLimit-Requests-Reset": str(int(reset * 1000)),
+        }
+        if not allowed:
+            headers["Retry-After"] = f"{reset - now:.3f}"
+        return allowed, headers
+
+    def fail(self) -> bool:
+        # Whether to fail the current request, error_rate of the time
+        if not self.error_rate:
+            return False
+        with self.lock:
+            if failed := self.random.random() < self.error_rate:
+                self.errors += 1
+        return failed
+
+    def padded(self, description: str) -> str:
+        # The description repeated or cut to description_size bytes
+        size = self.description_size or 0
+        filler = (
+            description or "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+        )
+        return (filler * (size // len(filler) + 1))[:size]
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.rate_limited = 0
+            self.errors = 0
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="fake_linear", description="Serve a fake Linear GraphQL API locally"
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--issues", type=int, default=1000, help="issues to serve, as T-1 to T-<issues>"
+    )
+    parser.add_argument("--team", default="T", help="team key of the issues")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="delay added to every response"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="share of requests that fail with HTTP 500",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        help="requests answered per window, HTTP 429 afterwards",
+    )
+    parser.add_argument(
+        "--rate-limit-window",
+        type=float,
+        default=3600,
+        help="rate limit window in seconds",
+    )
+    parser.add_argument(
+        "--description-size",
+        type=int,
+        help="bytes every issue description is padded to",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random failures")
+    args = parser.parse_args()
+
+    issues = {
+        f"{args.team}-{i}": {
+            "title": f"Issue {i}",
+            "description": f"Description of issue {i}",
+        }
+        for i in range(1, args.issues + 1)
+    }
+    server = FakeLinearServer(
+        issues,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        error_rate=args.error_rate,
+        description_size=args.description_size,
+        seed=args.seed,
+    )
+    print(
+        f"Serving {len(issues)} issues at {server.url}, set LINEAR_API_URL to it",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(
+            f"{server.requests} requests, {server.errors} errors, "
+            f"{server.rate_limited} rate limited, {server.bytes_sent} bytes sent"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Read repository state straight from the git directory, avoiding a git
+subprocess on the commit path. Every function returns None when the
+repository layout is not one it understands (e.g. reftable refs or
+GIT_CEILING_DIRECTORIES), in which case callers fall back to asking git.
+"""
+
+import os
+
+SHA_LENGTHS = (40, 64)
+# Files git keeps in the git directory while an operation that creates
+# commits is stopped or in progress
+OPERATION_MARKERS = [
+    ("rebase-merge", "rebase"),
+    ("rebase-apply/applying", "am"),
+    ("rebase-apply", "rebase"),
+    ("CHERRY_PICK_HEAD", "cherry-pick"),
+    ("REVERT_HEAD", "revert"),
+    ("BISECT_LOG", "bisect"),
+]
+
+
+def find_git_dir(path: str | None = None) -> str | None:
+    # git exports GIT_DIR to hooks in some situations (e.g. worktrees),
+    # it takes precedence like for git itself
+    if git_dir := os.environ.get("GIT_DIR"):
+        return os.path.abspath(git_dir)
+    if "GIT_CEILING_DIRECTORIES" in os.environ:
+        return None
+    path = os.path.abspath(path or os.getcwd())
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            # Worktrees and submodules have a .git file pointing at their git directory
+            try:
+                with open(dot_git) as fh:
+                    content = fh.read().strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir: "):
+                return None
+            return os.path.normpath(os.path.join(path, content[len("gitdir: ") :]))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def read_head(git_dir: str | None = None) -> str | None:
+    # Returns the ref HEAD points to (e.g. refs/heads/main) or the
+    # commit SHA when HEAD is detached
+    if (git_dir := git_dir or find_git_dir()) is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as fh:
+            head = fh.read().strip()
+    except OSError:
+        return None
+    if head.startswith("ref: "):
+        ref = head[len("ref: ") :]
+        # Repositories using the reftable backend keep a placeholder HEAD
+        return None if ref == "refs/heads/.invalid" else ref
+    if len(head) in SHA_LENGTHS and all(c in "0123456789abcdef" for c in head):
+        return head
+    return None
+
+
+def operation_in_progress(git_dir: str | None = None) -> str | None:
+    # Returns rebase, am, cherry-pick, revert or bisect while one of
+    # them is in progress in the worktree
+    if (git_dir := git_dir or find_git_dir()) is None:
+        return None
+    for marker, operation in OPERATION_MARKERS:
+        if os.path.exists(os.path.join(git_dir, marker)):
+            return operation
+    return None
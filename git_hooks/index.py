@@ -0,0 +1,243 @@
+"""Local SQLite index of the Linear issues of the configured teams (see
+git_hooks/config.py).
+`git-hooks sync` fills it and keeps it up to date incrementally: only issues updated
+since the previous sync are fetched, in pages of SYNC_PAGE_SIZE issues.
+prepare-commit-msg looks issues up in the index before asking Linear, which makes
+the lookup instantaneous and works offline. Nothing is imported or opened unless the
+database exists, so the index costs nothing to hooks when sync has never been run.
+Issue titles are also indexed word by word with SQLite's FTS5 full-text search, which
+suggest() uses to find the issues a branch without an issue reference is likely about.
+"""
+
+import os
+from typing import TYPE_CHECKING
+
+from git_hooks import cache
+
+if TYPE_CHECKING:
+    import sqlite3
+
+SUGGEST_LIMIT = int(os.environ.get("GIT_HOOKS_SUGGEST_LIMIT", 5))
+SUGGEST_COMMON_WORD_ISSUES = 500
+SYNC_PAGE_SIZE = int(os.environ.get("GIT_HOOKS_SYNC_PAGE_SIZE", 250))
+
+SYNC_QUERY = """
+query Issues ($first: Int, $after: String, $filter: IssueFilter) {
+  issues(first: $first, after: $after, filter: $filter, orderBy: updatedAt) {
+    nodes { identifier title description updatedAt }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+
+def index_path() -> str:
+    return os.path.join(cache.cache_dir(), "issues.sqlite3")
+
+
+def connect(path: str | None = None) -> "sqlite3.Connection":
+    import sqlite3
+
+    path = path or index_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    # Hooks keep reading while a sync writes
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS issues (
+            identifier TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sync_state (
+            scope TEXT PRIMARY KEY,
+            updated_at TEXT NOT NULL
+        );
+        """
+    )
+    try:
+        create_title_index(connection)
+    except sqlite3.OperationalError:
+        # SQLite was built without FTS5, there are no suggestions then
+        pass
+    return connection
+
+
+def create_title_index(connection: "sqlite3.Connection") -> None:
+    # The full-text index refers to the rows of issues instead of
+    # storing the titles again, triggers keep it current
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'issue_titles'"
+    ).fetchone()
+    if exists:
+        return
+    with connection:
+        connection.executescript(
+            """
+            CREATE VIRTUAL TABLE issue_titles USING fts5(
+                title,
+                content = 'issues',
+                content_rowid = 'rowid',
+                tokenize = 'porter unicode61'
+            );
+            CREATE TRIGGER issue_titles_insert AFTER INSERT ON issues BEGIN
+                INSERT INTO issue_titles (rowid, title) VALUES (new.rowid, new.title);
+            END;
+            CREATE TRIGGER issue_titles_delete AFTER DELETE ON issues BEGIN
+                INSERT INTO issue_titles (issue_titles, rowid, title)
+                VALUES ('delete', old.rowid, old.title);
+            END;
+            CREATE TRIGGER issue_titles_update AFTER UPDATE OF title ON issues BEGIN
+                INSERT INTO issue_titles (issue_titles, rowid, title)
+                VALUES ('delete', old.rowid, old.title);
+                INSERT INTO issue_titles (rowid, title) VALUES (new.rowid, new.title);
+            END;
+            INSERT INTO issue_titles (issue_titles) VALUES ('rebuild');
+            """
+        )
+
+
+def get(issue: str) -> dict[str, str] | None:
+    path = index_path()
+    if not os.path.exists(path):
+        return None
+    import sqlite3
+
+    try:
+        connection = sqlite3.connect(path, timeout=1)
+        try:
+            row = connection.execute(
+                "SELECT title, description FROM issues WHERE identifier = ?",
+                (issue.upper(),),
+            ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return {"title": row[0], "description": row[1]} if row else None
+
+
+def suggest(words: list[str], limit: int | None = None) -> list[tuple[str, str]]:
+    # Issues whose titles best match any of the words, best first, as
+    # (identifier, title) pairs
+    limit = SUGGEST_LIMIT if limit is None else limit
+    path = index_path()
+    if not words or limit <= 0 or not os.path.exists(path):
+        return []
+    import sqlite3
+
+    # Every word is quoted so that it is never read as FTS5 syntax, and
+    # matched as a prefix
+    terms = ['"{}"*'.format(word.replace('"', '""')) for word in words]
+    try:
+        connection = sqlite3.connect(path, timeout=1)
+        try:
+            # Ranking reads every matching title, and a word found in a large
+            # part of them costs the most while telling the least about which
+            # issue is meant. Such words are left out unless no other is left
+            rare_terms = [
+                term
+                for term in terms
+                if connection.execute(
+                    "SELECT count(*) FROM "
+                    "(SELECT 1 FROM issue_titles WHERE issue_titles MATCH ? LIMIT ?)",
+                    (term, SUGGEST_COMMON_WORD_ISSUES),
+                ).fetchone()[0]
+                < SUGGEST_COMMON_WORD_ISSUES
+            ]
+            query = " OR ".join(rare_terms) if rare_terms else " AND ".join(terms)
+            return connection.execute(
+                """
+                SELECT issues.identifier, issues.title
+                FROM issue_titles JOIN issues ON issues.rowid = issue_titles.rowid
+                WHERE issue_titles MATCH ? ORDER BY rank LIMIT ?
+                """,
+                (query, limit),
+            ).fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return []
+
+
+def upsert(connection: "sqlite3.Connection", issues: list[dict]) -> None:
+    connection.executemany(
+        """
+        INSERT INTO issues (identifier, title, description, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (identifier) DO UPDATE SET
+            title = excluded.title,
+            description = excluded.description,
+            updated_at = excluded.updated_at
+        """,
+        [
+            (i["identifier"].upper(), i["title"], i["description"], i["updatedAt"])
+            for i in issues
+        ],
+    )
+
+
+def sync(
+    teams: list[str], full: bool = False, path: str | None = None
+) -> dict[str, int]:
+    import gql
+
+    from git_hooks import prepare_commit_msg
+
+    scope = ",".join(sorted(team.upper() for team in teams))
+    connection = connect(path)
+    try:
+        row = connection.execute(
+            "SELECT updated_at FROM sync_state WHERE scope = ?", (scope,)
+        ).fetchone()
+        since = None if full or row is None else row[0]
+        issue_filter: dict = {"team": {"key": {"in": scope.split(",")}}}
+        if since:
+            # Issues updated in the same millisecond as the last one
+            # seen are fetched again rather than missed
+            issue_filter["updatedAt"] = {"gte": since}
+
+        query = gql.gql(SYNC_QUERY)
+        stats = {"issues": 0, "pages": 0}
+        latest = since
+        after = None
+        with prepare_commit_msg.linear_client(
+            prepare_commit_msg.LINEAR_MAX_WAIT
+        ) as session:
+            while True:
+                response = session.execute(
+                    query,
+                    variable_values={
+                        "first": SYNC_PAGE_SIZE,
+                        "after": after,
+                        "filter": issue_filter,
+                    },
+                )
+                nodes = response["issues"]["nodes"]
+                page_info = response["issues"]["pageInfo"]
+                # One transaction per page, an interrupted sync keeps
+                # the pages it got and starts over next time
+                with connection:
+                    upsert(connection, nodes)
+                stats["pages"] += 1
+                stats["issues"] += len(nodes)
+                latest = (
+                    max([latest or "", *(node["updatedAt"] for node in nodes)]) or None
+                )
+                if not page_info["hasNextPage"] or not nodes:
+                    break
+                after = page_info["endCursor"]
+
+        # The cursor only moves once every page has been stored
+        if latest:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync_state (scope, updated_at) "
+                    "VALUES (?, ?)",
+                    (scope, latest),
+                )
+    finally:
+        connection.close()
+    return stats
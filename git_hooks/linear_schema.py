@@ -0,0 +1,100 @@
+"""Snapshot of the subset of Linear's GraphQL schema
+(https://studio.apollographql.com/public/Linear-API) used by these hooks.
+Queries are validated against it locally so that no introspection query has
+to be sent to Linear on each hook run. Extend it when querying new fields.
+"""
+
+LINEAR_SCHEMA: str = """
+schema {
+  query: Query
+}
+
+"Represents a date and time in ISO 8601 format."
+scalar DateTime
+
+type Query {
+  "One specific issue."
+  issue(id: String!): Issue!
+  "All issues."
+  issues(
+    "A cursor to be used with first for forward pagination."
+    after: String
+    "Filter returned issues."
+    filter: IssueFilter
+    "The number of items to forward paginate (used with after). Defaults to 50."
+    first: Int
+    "By which field should the pagination order by. Available options are createdAt (default) and updatedAt."
+    orderBy: PaginationOrderBy
+  ): IssueConnection!
+}
+
+"By which field should the pagination order by"
+enum PaginationOrderBy {
+  createdAt
+  updatedAt
+}
+
+type IssueConnection {
+  nodes: [Issue!]!
+  pageInfo: PageInfo!
+}
+
+type PageInfo {
+  "Indicates if there are more results when paginating forward."
+  hasNextPage: Boolean!
+  "Cursor representing the last result in the paginated results."
+  endCursor: String
+}
+
+"Issue filtering options."
+input IssueFilter {
+  "Comparator for the updated at date."
+  updatedAt: DateComparator
+  "Filters that the issues team must satisfy."
+  team: TeamFilter
+}
+
+"Team filtering options."
+input TeamFilter {
+  "Comparator for the team key."
+  key: StringComparator
+}
+
+"Comparator for strings."
+input StringComparator {
+  "Equals constraint."
+  eq: String
+  "In-array constraint."
+  in: [String!]
+}
+
+"Comparator for dates."
+input DateComparator {
+  "Greater-than constraint. Matches any values that are greater than the given value."
+  gt: DateTime
+  "Greater-than-or-equal constraint. Matches any values that are greater than or equal to the given value."
+  gte: DateTime
+}
+
+"An organizational unit that contains issues."
+type Team {
+  "The team's unique key. The key is used in URLs."
+  key: String!
+}
+
+"An issue."
+type Issue {
+  "The unique identifier of the entity."
+  id: ID!
+  "Issue's human readable identifier (e.g. ENG-123)."
+  identifier: String!
+  "The issue's title."
+  title: String!
+  "The issue's description in markdown format."
+  description: String
+  "The last time at which the entity was meaningfully updated."
+  updatedAt: DateTime!
+  "The team that the issue is associated with."
+  team: Team!
+}
+"""
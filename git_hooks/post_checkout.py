@@ -0,0 +1,40 @@
+"""This hook warms the Linear issue cache when a branch is checked out.
+It uses the branch name to determine the issue number and, if LINEAR_API_KEY
+is set and the issue is not cached yet, fetches its title and description in
+a detached background process (see git_hooks/prefetch.py) so that
+prepare-commit-msg finds them locally. It never blocks or fails the checkout.
+"""
+
+import os
+import sys
+
+from git_hooks import cache
+from git_hooks import prefetch
+from git_hooks import prepare_commit_msg
+
+
+def main():
+    # git passes the previous HEAD, the new HEAD and a flag that is 1
+    # for branch checkouts (0 for file checkouts). pre-commit passes no
+    # arguments and sets PRE_COMMIT_CHECKOUT_TYPE to the flag instead
+    if len(sys.argv) >= 4:
+        checkout_type = sys.argv[3]
+    else:
+        checkout_type = os.environ.get("PRE_COMMIT_CHECKOUT_TYPE")
+    if checkout_type != "1":
+        return
+    if not prepare_commit_msg.LINEAR_API_KEY:
+        return
+    if (branch := prepare_commit_msg.get_branch_name()) is None:
+        return
+    issue = prepare_commit_msg.extract_branch_data(branch)["issue"]
+    if not issue or cache.get(issue) is not None:
+        return
+    try:
+        prefetch.spawn(issue)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""This server-side hook rejects pushes introducing commits whose message does not
+conform to <linear issue>/<conventional commit type>[!]: <title> (see
+git_hooks/commit_msg.py), which clients can bypass with --no-verify. Install it as
+hooks/pre-receive of the repository on the git server.
+For every updated ref it validates only the commits that are not reachable
+from any existing ref yet, streaming the messages from one git log process
+per ref, with up to GIT_HOOKS_PRE_RECEIVE_JOBS refs processed in parallel.
+"""
+
+import os
+import sys
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from git_hooks import commit_msg
+
+ZERO_SHAS = {"0" * 40, "0" * 64}
+PRE_RECEIVE_JOBS = int(
+    os.environ.get("GIT_HOOKS_PRE_RECEIVE_JOBS", min(8, os.cpu_count() or 1))
+)
+
+
+def read_ref_updates(lines: Iterable[str]) -> list[tuple[str, str, str]]:
+    # git passes "<old-value> <new-value> <ref-name>" per updated ref on stdin
+    updates = []
+    for line in lines:
+        if parts := line.split():
+            old, new, ref = parts
+            updates.append((old, new, ref))
+    return updates
+
+
+def find_invalid_commits(new: str, cwd: str | None = None) -> list[tuple[str, str]]:
+    # Commits reachable from existing refs were validated when they were pushed
+    commits = commit_msg.iter_commits([new, "--not", "--all"], cwd=cwd)
+    return list(commit_msg.iter_invalid_commits(commits))
+
+
+def validate_ref_updates(
+    updates: list[tuple[str, str, str]],
+    cwd: str | None = None,
+    jobs: int = PRE_RECEIVE_JOBS,
+) -> dict[str, list[tuple[str, str]]]:
+    updates = [(old, new, ref) for old, new, ref in updates if new not in ZERO_SHAS]
+    with ThreadPoolExecutor(max(1, jobs)) as executor:
+        results = executor.map(
+            lambda update: find_invalid_commits(update[1], cwd), updates
+        )
+        return {
+            ref: invalid for (_, _, ref), invalid in zip(updates, results) if invalid
+        }
+
+
+def main():
+    invalid_refs = validate_ref_updates(read_ref_updates(sys.stdin))
+    for ref, invalid_commits in invalid_refs.items():
+        print(
+            f"{commit_msg.ERRC}{ref}: {len(invalid_commits)} invalid commit message(s)"
+            f"{commit_msg.ENDC}",
+            file=sys.stderr,
+        )
+        for sha, title in invalid_commits:
+            print(commit_msg.format_invalid_commit(sha, title), file=sys.stderr)
+    if invalid_refs:
+        print(commit_msg.error, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Fetch Linear issues into the cache (see git_hooks/cache.py) from a
+detached background process. spawn() records the issue as the pending
+prefetch and returns immediately. The background process waits for
+GIT_HOOKS_PREFETCH_DEBOUNCE seconds and only fetches the issue if no newer
+prefetch was requested in the meantime, so rapid branch switches result in at
+most one request. Prefetches without a debounce, e.g. the refresh of a stale
+cache entry by prepare-commit-msg, neither wait nor supersede pending ones.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from git_hooks import cache
+
+PREFETCH_DEBOUNCE = float(os.environ.get("GIT_HOOKS_PREFETCH_DEBOUNCE", 1))
+
+
+def pending_path() -> str:
+    return os.path.join(cache.cache_dir(), "prefetch.json")
+
+
+def spawn(issue: str, debounce: float = PREFETCH_DEBOUNCE) -> None:
+    token = f"{os.getpid()}-{time.time_ns()}"
+    if debounce > 0:
+        cache.write_json(pending_path(), {"issue": issue, "token": token})
+    subprocess.Popen(
+        [sys.executable, "-m", "git_hooks.prefetch", issue, token, str(debounce)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run(issue: str, token: str, debounce: float) -> None:
+    if debounce > 0:
+        time.sleep(debounce)
+        pending = cache.read_json(pending_path())
+        if pending and pending.get("token") != token:
+            # Superseded by a more recent prefetch
+            return
+    if cache.get(issue) is None:
+        from git_hooks import prepare_commit_msg
+
+        prepare_commit_msg.cached_linear_issue(issue, stale=False)
+
+
+def main():
+    issue, token, debounce = sys.argv[1:4]
+    try:
+        run(issue, token, float(debounce))
+    except Exception:
+        # Nobody is waiting for the result, the hook fetches the issue
+        # itself if it is still missing
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,85 @@
 """This hook prepares a commit message containing a reference to a Linear issue as well as a conventional commit type.
 It uses the branch name to determine the issue number and the commit message title as well as the conventional commit type.
 If LINEAR_API_KEY is set, it fetches the issue title and description from Linear and populates the commit message with it.
+Issue details are cached on disk (see git_hooks/cache.py) so repeat commits on a branch do not query Linear again,
+and issues in the local index maintained by `git-hooks sync` (see git_hooks/index.py) are never fetched. Errors such
+as an unknown issue or a rejected API key are cached for a shorter time and shown again without a request. With
+GIT_HOOKS_CACHE_MAX_STALE, expired entries are used while a detached process refreshes them for the next commit.
+When the branch name references no issue, issues from the index with titles similar to it are suggested in the editor.
+Queries are validated against a bundled schema snapshot (see git_hooks/linear_schema.py) unless GIT_HOOKS_LINEAR_SCHEMA
+is set to "remote" (fetch the schema from Linear on each run) or "off" (skip client-side validation).
+Lookups are abandoned after GIT_HOOKS_LINEAR_TIMEOUT_MS and skipped for GIT_HOOKS_LINEAR_COOLDOWN seconds after
+GIT_HOOKS_LINEAR_FAILURES consecutive failures, in which case the title derived from the branch name is used.
+Requests are throttled to stay within Linear's rate limits by a budget shared by all processes (see
+git_hooks/ratelimit.py).
+With GIT_HOOKS_ASYNC=1, the Linear lookup starts as soon as the issue is known from the branch and overlaps with
+reading and parsing the commit message; it is abandoned when the message turns out not to need it.
+If a daemon is running (see git_hooks/daemon.py), the commit message is prepared by it instead.
+Only the title of the commit message is read into memory; the rest is streamed through to a temporary file that
+atomically replaces the original, and the file is left untouched when nothing changes.
+The hook exits right away for the commit sources and operations in progress listed in GIT_HOOKS_SKIP, e.g. for
+every commit replayed by a rebase or amended with --amend, before the branch is even resolved.
 If DEFAULT_COMMIT_TYPE is set, it uses that as the default commit type when none is detected (defaults to "feat").
 See https://www.conventionalcommits.org for examples of conventional commit types.
 """
 
+import contextlib
+import functools
 import os
 import re
 import sys
-import subprocess
-import gql
-from gql.transport.requests import RequestsHTTPTransport
-
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
+
+from git_hooks import cache
+from git_hooks import client
 from git_hooks import common
+from git_hooks import gitdir
+from git_hooks import tracing
+
+# gql pulls in requests, urllib3 and graphql-core, so it is only
+# imported when Linear is actually queried. Neither are subprocess,
+# the index and the schema snapshot, which a commit prepared by the
+# daemon (see git_hooks/client.py) does not need either
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import gql
+    import graphql
 
 EDITOR_TEXT = "# Please enter the commit message for your changes."
 
 LINEAR_API_KEY = os.environ.get("LINEAR_API_KEY")
+LINEAR_API_URL = os.environ.get("LINEAR_API_URL", "https://api.linear.app/graphql")
+LINEAR_SCHEMA_MODE = os.environ.get("GIT_HOOKS_LINEAR_SCHEMA", "bundled").lower()
+LINEAR_BATCH_SIZE = int(os.environ.get("GIT_HOOKS_LINEAR_BATCH_SIZE", 50))
+LINEAR_TIMEOUT_MS = int(os.environ.get("GIT_HOOKS_LINEAR_TIMEOUT_MS", 3000))
+LINEAR_FAILURES = int(os.environ.get("GIT_HOOKS_LINEAR_FAILURES", 3))
+LINEAR_COOLDOWN = int(os.environ.get("GIT_HOOKS_LINEAR_COOLDOWN", 300))
+LINEAR_BREAKER_LOCK_TIMEOUT = 0.1
+LINEAR_MAX_WAIT = float(os.environ.get("GIT_HOOKS_LINEAR_MAX_WAIT", 300))
+LINEAR_CACHEABLE_ERROR_CODES = {"AUTHENTICATION_ERROR", "FORBIDDEN"}
+LINEAR_CACHEABLE_ERROR_TYPES = {"authentication error", "forbidden"}
 DEFAULT_COMMIT_TYPE = os.environ.get("DEFAULT_COMMIT_TYPE", "feat")
+STREAM_CHUNK_SIZE = 1 << 20
+ASYNC_MODE = os.environ.get("GIT_HOOKS_ASYNC", "").lower() in ("1", "true", "on")
+# Commit sources passed by git (merge, squash, commit for -c/-C/--amend)
+# and operations in progress (rebase, am, cherry-pick, revert, bisect)
+# for which the message is left alone
+SKIP = {
+    name.strip()
+    for name in os.environ.get(
+        "GIT_HOOKS_SKIP", "merge,squash,commit,rebase,am,cherry-pick,revert,bisect"
+    ).split(",")
+    if name.strip()
+}
+
+# Connected session reused for every lookup by long-lived processes (see
+# git_hooks/daemon.py)
+linear_session = None
 
 
 # Convert branch name to commit message
@@ -27,33 +89,68 @@ def branch_to_commit_msg(branch: str) -> str:
 
 # Check prefix for hints like hotfix/feat/etc:
 def prefix_to_commit_type(prefix: str) -> str:
-    if prefix_match := re.match(common.prefix_regex, prefix):
+    if prefix_match := common.prefix_pattern.match(prefix):
         return prefix_match.group(1)
     return DEFAULT_COMMIT_TYPE
 
 
 def get_branch_name() -> str | None:
+    # Read HEAD directly when possible, forking git is comparatively slow
+    if (head := gitdir.read_head()) is not None:
+        if head.startswith("refs/heads/"):
+            return head[len("refs/heads/") :]
+        if not head.startswith("refs/"):
+            # Detached HEAD, there is no branch
+            return None
+    import subprocess
+
     try:
-        return (
-            subprocess.check_output(["git", "symbolic-ref", "--short", "HEAD"])
-            .strip()
-            .decode()
-        )
+        with tracing.span("git symbolic-ref"):
+            output = subprocess.check_output(["git", "symbolic-ref", "--short", "HEAD"])
+        return output.strip().decode()
     except subprocess.CalledProcessError:
         # If branch name cannot be determined, there is nothing else to do
         pass
 
 
-def linear_client() -> gql.Client:
-    transport = RequestsHTTPTransport(
-        url="https://api.linear.app/graphql",
+def linear_client(max_wait: float | None = None) -> "gql.Client":
+    # max_wait bounds the seconds spent waiting for the rate limit (see
+    # git_hooks/ratelimit.py), hooks do not wait longer than a lookup
+    # may take, bulk operations pass LINEAR_MAX_WAIT
+    with tracing.span("import gql"):
+        import gql
+
+        from git_hooks import ratelimit
+
+    transport = ratelimit.RateLimitedTransport(
+        url=LINEAR_API_URL,
         headers={"Authorization": LINEAR_API_KEY},
+        timeout=LINEAR_TIMEOUT_MS / 1000,
+        max_wait=LINEAR_TIMEOUT_MS / 1000 if max_wait is None else max_wait,
     )
-    return gql.Client(transport=transport, fetch_schema_from_transport=True)
+    if LINEAR_SCHEMA_MODE == "remote":
+        return gql.Client(transport=transport, fetch_schema_from_transport=True)
+    if LINEAR_SCHEMA_MODE == "off":
+        return gql.Client(transport=transport)
+    with tracing.span("linear_schema"):
+        return gql.Client(transport=transport, schema=linear_schema())
+
+
+@functools.cache
+def linear_schema() -> "graphql.GraphQLSchema":
+    # Building the schema from the snapshot takes several milliseconds,
+    # only do it once per process
+    from graphql import build_schema
+
+    from git_hooks.linear_schema import LINEAR_SCHEMA
+
+    return build_schema(LINEAR_SCHEMA)
 
 
 def retrieve_linear_issue(issue: str) -> dict[str, str]:
-    client = linear_client()
+    import gql
+
+    session = linear_session or linear_client()
     query = gql.gql(
         """
         query Issue ($issue: String!) {
@@ -65,47 +162,292 @@ def retrieve_linear_issue(issue: str) -> dict[str, str]:
         """
     )
     values = {"issue": issue}
-    response = client.execute(query, variable_values=values)
-    title = response["issue"]["title"]
-    description = response["issue"]["description"]
+    response = session.execute(query, variable_values=values)
+    return linear_issue_data(response["issue"])
+
+
+def linear_issue_data(linear_issue: dict) -> dict[str, str]:
+    title = linear_issue["title"]
+    description = linear_issue["description"]
     return {
         "title": title.strip() if title else "",
         "description": f"{description.strip()}\n\n" if description else "",
     }
 
 
+def retrieve_linear_issues(issues: list[str]) -> dict[str, dict[str, str]]:
+    # Fetch many issues with one aliased query per LINEAR_BATCH_SIZE
+    # issues, unknown issues are left out
+    linear_issues = {}
+    issues = list(dict.fromkeys(issue.upper() for issue in issues))
+    if linear_session is None:
+        client_context = linear_client(LINEAR_MAX_WAIT)
+    else:
+        client_context = nullcontext(linear_session)
+    with client_context as session:
+        for start in range(0, len(issues), LINEAR_BATCH_SIZE):
+            chunk = issues[start : start + LINEAR_BATCH_SIZE]
+            linear_issues.update(retrieve_linear_issue_batch(session, chunk))
+    return linear_issues
+
+
+def retrieve_linear_issue_batch(
+    session, issues: list[str]
+) -> dict[str, dict[str, str]]:
+    import gql
+
+    variables = ", ".join(f"$i{n}: String!" for n in range(len(issues)))
+    fields = "\n".join(
+        f"i{n}: issue(id: $i{n}) {{ title description }}" for n in range(len(issues))
+    )
+    query = gql.gql(f"query Issues ({variables}) {{\n{fields}\n}}")
+    values = {f"i{n}": issue for n, issue in enumerate(issues)}
+    try:
+        response = session.execute(query, variable_values=values)
+    except Exception as exception:
+        # Linear reports an unknown issue as an error on its alias, which fails
+        # the whole query as issue is non-null. Keep what resolved and retry once
+        # without the failed aliases. Errors that are not on an alias of the
+        # batch, e.g. a rejected API key, would fail every issue and are raised
+        errors = [
+            error
+            for error in getattr(exception, "errors", None) or []
+            if isinstance(error, dict)
+        ]
+        failed = {error["path"][0] for error in errors if error.get("path")}
+        if (
+            not errors
+            or not all(error.get("path") for error in errors)
+            or not failed <= values.keys()
+        ):
+            raise
+        if any(
+            (error.get("extensions") or {}).get("code") == "AUTHENTICATION_ERROR"
+            for error in errors
+        ):
+            raise
+        data = getattr(exception, "data", None) or {}
+        resolved = {
+            issue: linear_issue_data(data[alias])
+            for alias, issue in values.items()
+            if data.get(alias) is not None
+        }
+        rest = [
+            issue
+            for alias, issue in values.items()
+            if alias not in failed and issue not in resolved
+        ]
+        return {
+            **resolved,
+            **(retrieve_linear_issue_batch(session, rest) if rest else {}),
+        }
+    return {
+        issue: linear_issue_data(response[f"i{n}"]) for n, issue in enumerate(issues)
+    }
+
+
+class LinearUnavailable(Exception):
+    pass
+
+
+class LinearLookupError(Exception):
+    # An error Linear answered a lookup with earlier, replayed from the cache
+    def __init__(self, messages: list[str]):
+        super().__init__("\n".join(messages))
+        self.errors = [{"message": message} for message in messages]
+
+
+def linear_key_fingerprint() -> str:
+    # Errors are cached per API key, without storing the key itself
+    import hashlib
+
+    return hashlib.sha256((LINEAR_API_KEY or "").encode()).hexdigest()[:16]
+
+
+def is_cacheable_linear_error(error: dict | str) -> bool:
+    # An unknown issue, an issue the key has no access to or a rejected
+    # key, by code or type when Linear gives one
+    if not isinstance(error, dict):
+        return False
+    extensions = error.get("extensions") or {}
+    if extensions.get("code") in LINEAR_CACHEABLE_ERROR_CODES:
+        return True
+    if extensions.get("type") in LINEAR_CACHEABLE_ERROR_TYPES:
+        return True
+    return str(error.get("message", "")).startswith("Entity not found")
+
+
+def linear_error_messages(exception: Exception) -> list[str] | None:
+    # The messages of errors that repeating the lookup with the same key
+    # would get again, but not timeouts, outages or other errors
+    # reported by Linear, which count towards the breaker instead
+    if isinstance(errors := getattr(exception, "errors", None), list):
+        if errors and all(is_cacheable_linear_error(error) for error in errors):
+            return [error["message"] for error in errors]
+        return None
+    if getattr(exception, "code", None) in (401, 403):
+        return [str(exception)]
+    return None
+
+
+def start_in_thread(fn, *args) -> "Future":
+    # Run fn in a daemon thread so that a hung request neither blocks
+    # the hook nor its exit
+    from concurrent.futures import Future
+
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except Exception as exception:
+            future.set_exception(exception)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+def call_with_deadline(fn, *args, deadline: float):
+    # deadline is a time.monotonic() timestamp, fn is abandoned in its thread after it
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+
+    try:
+        return start_in_thread(fn, *args).result(max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        raise TimeoutError(
+            f"Linear did not respond within {LINEAR_TIMEOUT_MS} ms"
+        ) from None
+
+
+def linear_breaker_path() -> str:
+    return os.path.join(cache.cache_dir(), "linear-breaker.json")
+
+
+def linear_cooldown() -> float:
+    # Seconds left before Linear is queried again after repeated failures
+    state = cache.read_json(linear_breaker_path()) or {}
+    if state.get("failures", 0) < LINEAR_FAILURES:
+        return 0
+    return max(0, state.get("failed_at", 0) + LINEAR_COOLDOWN - time.time())
+
+
+def record_linear_result(success: bool) -> None:
+    path = linear_breaker_path()
+    if success and not cache.read_json(path):
+        return
+    # Concurrent hooks count their failures under a lock, like the rate
+    # limit state, and a result that cannot take it in time is not recorded
+    with cache.lock("linear-breaker", timeout=LINEAR_BREAKER_LOCK_TIMEOUT) as locked:
+        if not locked:
+            return
+        state = cache.read_json(path) or {}
+        state = (
+            {}
+            if success
+            else {"failures": state.get("failures", 0) + 1, "failed_at": time.time()}
+        )
+        try:
+            cache.write_json(path, state)
+        except OSError:
+            pass
+
+
+def cached_linear_issue(
+    issue: str, stale: bool = True, abandoned: threading.Event | None = None
+) -> dict[str, str]:
+    # Waiting for another process fetching the issue and fetching it
+    # ourselves share one LINEAR_TIMEOUT_MS budget
+    deadline = time.monotonic() + LINEAR_TIMEOUT_MS / 1000
+    if (linear_issue := cache.get(issue)) is not None:
+        return linear_issue
+    from git_hooks import index
+
+    with tracing.span("index"):
+        indexed_issue = index.get(issue)
+    if indexed_issue is not None:
+        return linear_issue_data(indexed_issue)
+    # Stale-while-revalidate: an expired entry within
+    # GIT_HOOKS_CACHE_MAX_STALE is used as is and refreshed by a detached
+    # process for the next commit (which calls this with stale=False)
+    if stale and cache.CACHE_MAX_STALE > cache.CACHE_TTL:
+        if (
+            linear_issue := cache.get(issue, max_age=cache.CACHE_MAX_STALE)
+        ) is not None:
+            from git_hooks import prefetch
+
+            with tracing.span("refresh_stale", issue=issue):
+                try:
+                    prefetch.spawn(issue, debounce=0)
+                except OSError:
+                    pass
+            return linear_issue
+    # Concurrent hooks missing the same issue wait for the one fetching
+    # it instead of fetching it again
+    with contextlib.ExitStack() as stack:
+        with tracing.span("cache_lock", issue=issue):
+            stack.enter_context(
+                cache.lock(issue, timeout=max(0.0, deadline - time.monotonic()))
+            )
+        if (linear_issue := cache.get(issue)) is not None:
+            return linear_issue
+        if (messages := cache.get_error(issue, linear_key_fingerprint())) is not None:
+            raise LinearLookupError(messages)
+        if cooldown := linear_cooldown():
+            raise LinearUnavailable(
+                f"Skipping Linear for another {cooldown:.0f} s "
+                f"after {LINEAR_FAILURES} failed lookups"
+            )
+        if time.monotonic() >= deadline:
+            # Another process held the lock for the whole budget, the
+            # outcome of its lookup is recorded by it
+            raise TimeoutError(f"Linear did not respond within {LINEAR_TIMEOUT_MS} ms")
+        try:
+            with tracing.span("retrieve_linear_issue", issue=issue):
+                linear_issue = call_with_deadline(
+                    retrieve_linear_issue, issue, deadline=deadline
+                )
+        except Exception as exception:
+            from git_hooks import ratelimit
+
+            # A speculative lookup nobody waits for any more (see run_async) cannot
+            # be cancelled in its thread, its failure is not recorded instead
+            if abandoned is not None and abandoned.is_set():
+                raise
+            # An unknown issue or a rejected key is remembered instead
+            # of counting as Linear being down, and rate limiting
+            # already holds back every process until the limit resets
+            if (messages := linear_error_messages(exception)) is not None:
+                cache.put_error(issue, linear_key_fingerprint(), messages)
+            elif not isinstance(exception, ratelimit.RateLimited):
+                record_linear_result(False)
+            raise
+        record_linear_result(True)
+        cache.put(issue, linear_issue)
+    return linear_issue
+
+
 def extract_commit_msg_title_data(commit_msg_title: str) -> dict[str, str]:
-    issue = ""
-    commit_type = ""
-    # If the commit message has linear ref, extract it from the commit message title
-    if commit_msg_match := re.match(common.commit_msg_issue_regex, commit_msg_title):
-        issue = commit_msg_match.group(1).upper()
-        commit_msg_title = commit_msg_match.group(2)
-    # If the commit message only has conventional commit tag but no linear ref, use those
-    if commit_msg_match := re.match(common.commit_msg_title_regex, commit_msg_title):
-        commit_type = commit_msg_match.group(1)
-        commit_msg_title = commit_msg_match.group(2)
+    title = common.parse_commit_msg_title(commit_msg_title)
     return {
-        "issue": issue,
-        "commit_type": commit_type,
-        "commit_msg_title": commit_msg_title,
+        "issue": title.issue,
+        "commit_type": f"{title.commit_type}!" if title.breaking else title.commit_type,
+        "commit_msg_title": title.title,
     }
 
 
 def extract_branch_data(branch: str) -> dict[str, str]:
     issue = ""
     commit_type = ""
-    commit_msg_title = ""
     _branch = branch
-    # If the branch has hints about linear reference, extract those
-    if branch_regex_match := re.match(common.branch_regex, branch):
-        prefix = branch_regex_match.group(1).lower()
-        commit_type = prefix_to_commit_type(prefix)
-        issue = branch_regex_match.group(2).upper()
-        _branch = branch_regex_match.group(3)
-    elif partial_branch_regex_match := re.match(common.partial_branch_regex, branch):
-        issue = partial_branch_regex_match.group(1).upper()
-        _branch = partial_branch_regex_match.group(2)
+    # If the branch has hints about linear reference and conventional
+    # commit type, extract those
+    if branch_match := common.branch_pattern.match(branch):
+        if (prefix := branch_match.group("prefix")) is not None:
+            commit_type = prefix_to_commit_type(prefix.lower())
+        issue = branch_match.group("issue").upper()
+        _branch = branch_match.group("title")
     commit_msg_title = branch_to_commit_msg(_branch)
 
     return {
@@ -115,11 +457,15 @@ def extract_branch_data(branch: str) -> dict[str, str]:
     }
 
 
-def retrieve_linear_data(issue: str, edit_mode: bool) -> dict[str, str]:
+def retrieve_linear_data(
+    issue: str,
+    edit_mode: bool,
+    fetch: Callable[[str], dict[str, str]] = cached_linear_issue,
+) -> dict[str, str]:
     # If LINEAR_API_KEY is set and issue number is not empty, fetch issue details
     if LINEAR_API_KEY:
         try:
-            linear_issue = retrieve_linear_issue(issue)
+            linear_issue = fetch(issue)
             return {
                 "commit_msg_title": linear_issue["title"],
                 "commit_msg_body": linear_issue["description"],
@@ -135,7 +481,11 @@ def retrieve_linear_data(issue: str, edit_mode: bool) -> dict[str, str]:
                 error_details += [f"#\t{e['message']}" for e in exception.errors]
             else:
                 error_details += [f"#\t{str(exception)}"]
-            error_details += ["#"]
+            error_details += [
+                "#",
+                "# Using the title derived from the branch name instead.",
+                "#",
+            ]
             return {
                 "commit_msg_body": "\n".join(error_details),
             }
@@ -155,15 +505,19 @@ def retrieve_linear_data(issue: str, edit_mode: bool) -> dict[str, str]:
         }
 
 
-def prepare_commit_msg(raw_commit_msg: str, branch: str) -> str:
-    commit_msg_lines = raw_commit_msg.splitlines()
-    edit_mode = EDITOR_TEXT in raw_commit_msg
+def prepare_commit_msg_title(
+    raw_commit_msg_title: str,
+    branch: str,
+    edit_mode: bool,
+    fetch: Callable[[str], dict[str, str]] = cached_linear_issue,
+) -> tuple[str, list[str], list[str]]:
+    # Returns the new title and the lines to insert before and after the
+    # rest of the message
     branch_data = extract_branch_data(branch)
-    raw_commit_msg_title = commit_msg_lines[0] if len(commit_msg_lines) > 0 else ""
 
     linear_data = {}
     if (issue := branch_data["issue"]) and not raw_commit_msg_title:
-        linear_data = retrieve_linear_data(issue, edit_mode)
+        linear_data = retrieve_linear_data(issue, edit_mode, fetch)
 
     commit_msg_title_data = extract_commit_msg_title_data(
         linear_data.get("commit_msg_title") or raw_commit_msg_title
@@ -172,44 +526,288 @@ def prepare_commit_msg(raw_commit_msg: str, branch: str) -> str:
     commit_msg_title = (
         commit_msg_title_data["commit_msg_title"] or branch_data["commit_msg_title"]
     )
-    commit_type_lines = [common.commit_types_doc_commented] if edit_mode else []
-    linear_commit_msg_lines = (
+    if commit_type:
+        commit_msg_title = f"{commit_type}: {commit_msg_title}"
+    if issue:
+        commit_msg_title = f"{issue}/{commit_msg_title}"
+
+    header_lines = (
         [linear_data["commit_msg_body"]] if linear_data.get("commit_msg_body") else []
     )
-    commit_msg_body = "\n".join(
-        linear_commit_msg_lines + commit_msg_lines[1:] + commit_type_lines
+    if edit_mode and not issue and not commit_msg_title_data["issue"]:
+        header_lines += suggested_issue_lines(
+            f"{branch} {raw_commit_msg_title}", commit_msg_title
+        )
+    footer_lines = [common.commit_types_doc_commented] if edit_mode else []
+    return commit_msg_title, header_lines, footer_lines
+
+
+def suggested_issue_lines(text: str, commit_msg_title: str) -> list[str]:
+    # Commented candidates for a commit that references no issue, from
+    # titles in the local index matching its words
+    words = [
+        word
+        for word in dict.fromkeys(re.findall(r"[^\W_]+", text.lower()))
+        if len(word) > 2 and word not in common.commit_types
+    ]
+    from git_hooks import index
+
+    with tracing.span("suggest"):
+        suggestions = index.suggest(words)
+    if not suggestions:
+        return []
+    return [
+        "# No Linear issue found in the branch name. Issues with similar titles:",
+        "#",
+        *(f"#\t{identifier}\t{title}" for identifier, title in suggestions),
+        "#",
+        "# Prefix the title with one of them, "
+        f"e.g. {suggestions[0][0]}/{commit_msg_title}",
+    ]
+
+
+def prepare_commit_msg(
+    raw_commit_msg: str,
+    branch: str,
+    fetch: Callable[[str], dict[str, str]] = cached_linear_issue,
+) -> str:
+    commit_msg_lines = raw_commit_msg.splitlines()
+    raw_commit_msg_title = commit_msg_lines[0] if len(commit_msg_lines) > 0 else ""
+    commit_msg_title, header_lines, footer_lines = prepare_commit_msg_title(
+        raw_commit_msg_title, branch, EDITOR_TEXT in raw_commit_msg, fetch
     )
+    commit_msg_body = "\n".join(header_lines + commit_msg_lines[1:] + footer_lines)
 
     # Write to commit message
     message = commit_msg_title
     if commit_msg_body:
         message = f"{message}\n\n{commit_msg_body}"
-    if commit_type:
-        message = f"{commit_type}: {message}"
-    if issue:
-        message = f"{issue}/{message}"
 
     return message
 
 
+def read_commit_msg_head(path: str) -> tuple[str, bool]:
+    # Only the title is kept in memory, the rest is scanned for
+    # EDITOR_TEXT one chunk at a time
+    overlap = len(EDITOR_TEXT) - 1
+    with open(path) as fh:
+        raw_commit_msg_title = fh.readline()
+        edit_mode = EDITOR_TEXT in raw_commit_msg_title
+        tail = raw_commit_msg_title[-overlap:]
+        while not edit_mode and (chunk := fh.read(STREAM_CHUNK_SIZE)):
+            window = tail + chunk
+            edit_mode = EDITOR_TEXT in window
+            tail = window[-overlap:]
+    return raw_commit_msg_title.removesuffix("\n"), edit_mode
+
+
+def iter_commit_msg_rest(fh) -> Iterator[str]:
+    # Yield the rest of fh in chunks, without its final newline; nothing
+    # at all if fh is exhausted
+    if not (previous := fh.read(STREAM_CHUNK_SIZE)):
+        return
+    while chunk := fh.read(STREAM_CHUNK_SIZE):
+        yield previous
+        previous = chunk
+    yield previous.removesuffix("\n")
+
+
+def write_commit_msg(
+    path: str, commit_msg_title: str, header_lines: list[str], footer_lines: list[str]
+) -> None:
+    # Equivalent to prepare_commit_msg() but streams the rest of the
+    # message from the original file
+    with open(path) as src:
+        src.readline()
+        rest = iter_commit_msg_rest(src)
+        first_chunk = next(rest, None)
+        body_lines = (
+            header_lines
+            + ([first_chunk] if first_chunk is not None else [])
+            + footer_lines
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as dst:
+                dst.write(commit_msg_title)
+                if len(body_lines) > 1 or any(body_lines):
+                    dst.write("\n\n")
+                    dst.write("\n".join(header_lines))
+                    if first_chunk is not None:
+                        dst.write("\n" if header_lines else "")
+                        dst.write(first_chunk)
+                        dst.writelines(rest)
+                    if footer_lines:
+                        dst.write("\n" if len(body_lines) > len(footer_lines) else "")
+                        dst.write("\n".join(footer_lines))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def skip_reason(args: list[str]) -> str | None:
+    # git passes the source of the message (message, template, merge,
+    # squash or commit) and, for commit, the SHA. pre-commit passes only
+    # the message file and sets them in the environment instead
+    if not args and (source := os.environ.get("PRE_COMMIT_COMMIT_MSG_SOURCE")):
+        args = [source, os.environ.get("PRE_COMMIT_COMMIT_OBJECT_NAME", "")]
+    if args and args[0] in SKIP:
+        return args[0]
+    if SKIP - {"message", "template", "merge", "squash", "commit"}:
+        if (operation := gitdir.operation_in_progress()) in SKIP:
+            return operation
+    return None
+
+
 def main():
+    tracing.record_startup()
+    try:
+        with tracing.span("prepare-commit-msg"):
+            if ASYNC_MODE:
+                import asyncio
+
+                asyncio.run(run_async())
+            else:
+                run()
+    finally:
+        tracing.flush()
+
+
+def run():
     # Commit message filepath is always the first argument
     commit_msg_filepath = sys.argv[1]
-    if (branch := get_branch_name()) is None:
+    with tracing.span("skip_reason"):
+        if skip_reason(sys.argv[2:]) is not None:
+            return
+    with tracing.span("get_branch_name"):
+        branch = get_branch_name()
+    if branch is None:
         return
 
-    # Read raw commit message
-    raw_commit_msg = open(commit_msg_filepath).read()
+    # Read the title of the raw commit message, the rest is only
+    # streamed through when writing
+    with tracing.span("read_commit_msg"):
+        raw_commit_msg_title, edit_mode = read_commit_msg_head(commit_msg_filepath)
 
     # Commit message is already valid, nothing else to do
-    if re.match(common.valid_commit_regex, raw_commit_msg):
+    if common.parse_commit_msg_title(raw_commit_msg_title).valid:
+        return
+
+    # Hand over to the daemon if one is running, it keeps a warm connection to Linear
+    with tracing.span("daemon"):
+        parts = client.prepare_commit_msg_title(raw_commit_msg_title, branch, edit_mode)
+    if parts is None:
+        with tracing.span("prepare_commit_msg"):
+            parts = prepare_commit_msg_title(raw_commit_msg_title, branch, edit_mode)
+
+    commit_msg_title, header_lines, footer_lines = parts
+    if (
+        commit_msg_title == raw_commit_msg_title
+        and not header_lines
+        and not footer_lines
+    ):
         return
+    with tracing.span("write_commit_msg"):
+        write_commit_msg(
+            commit_msg_filepath, commit_msg_title, header_lines, footer_lines
+        )
+
 
-    message = prepare_commit_msg(raw_commit_msg, branch)
+async def get_branch_name_async() -> str | None:
+    import asyncio
 
-    with open(commit_msg_filepath, "w+") as fh:
-        _ = fh.seek(0, 0)
-        _ = fh.write(message)
+    if (head := gitdir.read_head()) is not None and (
+        head.startswith("refs/heads/") or not head.startswith("refs/")
+    ):
+        return get_branch_name()
+    process = await asyncio.create_subprocess_exec(
+        "git", "symbolic-ref", "--short", "HEAD", stdout=asyncio.subprocess.PIPE
+    )
+    output, _ = await process.communicate()
+    return output.strip().decode() if process.returncode == 0 else None
+
+
+async def run_async():
+    import asyncio
+
+    commit_msg_filepath = sys.argv[1]
+    with tracing.span("skip_reason"):
+        if skip_reason(sys.argv[2:]) is not None:
+            return
+    with tracing.span("get_branch_name"):
+        branch = await get_branch_name_async()
+    if branch is None:
+        return
+
+    # Start the Linear lookup right away, unless a daemon is going to
+    # prepare the message
+    linear_task = None
+    abandoned = threading.Event()
+    issue = extract_branch_data(branch)["issue"]
+    if issue and LINEAR_API_KEY and not os.path.exists(client.socket_path()):
+        linear_task = asyncio.wrap_future(
+            start_in_thread(cached_linear_issue, issue, True, abandoned)
+        )
+
+    try:
+        with tracing.span("read_commit_msg"):
+            raw_commit_msg_title, edit_mode = await asyncio.to_thread(
+                read_commit_msg_head, commit_msg_filepath
+            )
+
+        # Commit message is already valid, nothing else to do
+        if common.parse_commit_msg_title(raw_commit_msg_title).valid:
+            return
+
+        with tracing.span("daemon"):
+            parts = await asyncio.to_thread(
+                client.prepare_commit_msg_title, raw_commit_msg_title, branch, edit_mode
+            )
+        if parts is None:
+            fetch = cached_linear_issue
+            # Linear is only consulted when the message has no title yet
+            if linear_task and not raw_commit_msg_title:
+                with tracing.span("await_linear"):
+                    try:
+                        linear_issue = await linear_task
+                        fetch = lambda _: linear_issue  # noqa: E731
+                    except Exception as exception:
+                        error = exception
+
+                        def fetch(_):
+                            raise error
+
+            with tracing.span("prepare_commit_msg"):
+                parts = prepare_commit_msg_title(
+                    raw_commit_msg_title, branch, edit_mode, fetch
+                )
+    finally:
+        # The lookup may still be running when it is not needed, e.g.
+        # for a valid title. Its thread cannot be stopped, so it is
+        # abandoned rather than cancelled and does not record a failure
+        abandoned.set()
+        if linear_task:
+            linear_task.cancel()
+
+    commit_msg_title, header_lines, footer_lines = parts
+    if (
+        commit_msg_title == raw_commit_msg_title
+        and not header_lines
+        and not footer_lines
+    ):
+        return
+    with tracing.span("write_commit_msg"):
+        await asyncio.to_thread(
+            write_commit_msg,
+            commit_msg_filepath,
+            commit_msg_title,
+            header_lines,
+            footer_lines,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+"""Rate limiting of the requests to Linear, shared by every process of the user.
+Linear limits the requests of each API key per hour. Every request first takes a
+token from a bucket stored in the cache dir (see git_hooks/cache.py), which refills
+at GIT_HOOKS_LINEAR_RATE_LIMIT requests per hour up to GIT_HOOKS_LINEAR_BURST
+requests, so that bulk tooling and many parallel hooks are throttled smoothly
+instead of tripping the limit. A process that cannot lock the bucket keeps a
+bucket of its own. When Linear reports the budget of the key as spent,
+or answers with HTTP 429 or a RATELIMITED error anyway, all processes wait until
+the time given by its rate limit headers, or an exponential backoff with jitter
+when there is none, and the request is retried up to RATE_LIMIT_RETRIES times.
+A request that would have to wait longer than the max_wait of its
+transport fails with RateLimited instead.
+"""
+
+import contextlib
+import os
+import random
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from gql.transport.exceptions import TransportServerError
+from gql.transport.requests import RequestsHTTPTransport
+from graphql import ExecutionResult
+
+from git_hooks import cache
+
+RATE_LIMIT = float(os.environ.get("GIT_HOOKS_LINEAR_RATE_LIMIT", 5000))
+BURST = float(os.environ.get("GIT_HOOKS_LINEAR_BURST", 50))
+RATE_LIMIT_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+STATE_LOCK_TIMEOUT = 1.0
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Linear rate limit reached, retry in {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+# Budget of this process alone, for when the shared state cannot be locked
+local_state: dict = {}
+local_state_lock = threading.Lock()
+
+
+def state_path() -> str:
+    return os.path.join(cache.cache_dir(), "linear-ratelimit.json")
+
+
+@contextlib.contextmanager
+def shared_state() -> Iterator[dict]:
+    # The state is read and written back under a lock, so that
+    # concurrent processes never spend the same token. A process that
+    # cannot take the lock (no flock on Windows, an unwritable cache dir
+    # or a holder stuck for STATE_LOCK_TIMEOUT) keeps a budget of its
+    # own instead of updating the file unlocked
+    with cache.lock("linear-ratelimit", timeout=STATE_LOCK_TIMEOUT) as locked:
+        if locked:
+            state = cache.read_json(state_path()) or {}
+            before = dict(state)
+            yield state
+            if state != before:
+                try:
+                    cache.write_json(state_path(), state)
+                except OSError:
+                    pass
+            return
+    with local_state_lock:
+        yield local_state
+
+
+def acquire(max_wait: float) -> float:
+    # Takes a token from the shared budget, waiting for it up to
+    # max_wait seconds, and returns the seconds waited
+    start = time.monotonic()
+    while True:
+        with shared_state() as state:
+            now = time.time()
+            wait = state.get("blocked_until", 0) - now
+            if wait <= 0:
+                if RATE_LIMIT <= 0:
+                    return time.monotonic() - start
+                elapsed = max(0.0, now - state.get("updated_at", now))
+                tokens = min(
+                    BURST, state.get("tokens", BURST) + elapsed * RATE_LIMIT / 3600
+                )
+                state["updated_at"] = now
+                if tokens >= 1:
+                    state["tokens"] = tokens - 1
+                    return time.monotonic() - start
+                state["tokens"] = tokens
+                wait = (1 - tokens) * 3600 / RATE_LIMIT
+        if time.monotonic() - start + wait > max_wait:
+            raise RateLimited(wait)
+        time.sleep(wait)
+
+
+def block(until: float) -> None:
+    # No process sends requests before until (a time.time() timestamp)
+    with shared_state() as state:
+        if until > state.get("blocked_until", 0):
+            state["blocked_until"] = until
+
+
+def reset_time(headers: Mapping[str, str]) -> float | None:
+    # When the spent budget of the key is replenished according to
+    # Linear, as a time.time() timestamp
+    if retry_after := headers.get("Retry-After"):
+        with contextlib.suppress(ValueError):
+            return time.time() + float(retry_after)
+    resets = []
+    for budget in ("Requests", "Complexity"):
+        remaining = headers.get(f"X-RateLimit-{budget}-Remaining")
+        reset = headers.get(f"X-RateLimit-{budget}-Reset")
+        with contextlib.suppress(TypeError, ValueError):
+            if float(remaining) <= 0:
+                # Reset times are reported in milliseconds since the epoch
+                resets.append(float(reset) / 1000)
+    return max(resets, default=None)
+
+
+def backoff(attempt: int) -> float:
+    # Exponential backoff with full jitter, so that processes limited at
+    # the same time do not retry in lockstep
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def is_rate_limited(result: ExecutionResult) -> bool:
+    return any(
+        isinstance(error, dict)
+        and (error.get("extensions") or {}).get("code") == "RATELIMITED"
+        for error in result.errors or []
+    )
+
+
+class RateLimitedTransport(RequestsHTTPTransport):
+    def __init__(self, *args: Any, max_wait: float = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Seconds a request may spend waiting for the rate limit, in
+        # total over its retries
+        self.max_wait = max_wait
+        # The daemon shares one transport between its threads, but the
+        # response headers are kept on the transport and requests sessions
+        # are not thread-safe, so requests are sent one at a time
+        self.lock = threading.Lock()
+
+    def execute(self, *args: Any, **kwargs: Any) -> ExecutionResult:
+        start = time.monotonic()
+        until = time.time()
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            acquire(self.max_wait - (time.monotonic() - start))
+            with self.lock:
+                try:
+                    result = super().execute(*args, **kwargs)
+                except TransportServerError as exception:
+                    if exception.code != 429:
+                        raise
+                    result = None
+                headers = self.response_headers or {}
+            if result is not None and not is_rate_limited(result):
+                # Stop every process as soon as Linear reports the
+                # budget as spent, before it starts refusing
+                if (reset := reset_time(headers)) is not None:
+                    block(reset)
+                return result
+            until = max(reset_time(headers) or 0, time.time() + backoff(attempt))
+            block(until)
+        raise RateLimited(until - time.time())
@@ -0,0 +1,335 @@
+"""Bulk rewrite of existing commit messages to the <linear issue>/<conventional commit
+type>: <title> format. Run it as `git-hooks rewrite [<revision>...]` (default: the
+commits of the current branch not on its upstream), e.g. when onboarding a repository
+whose history predates the hooks. The history is streamed through a single `git
+fast-export | git fast-import` pipeline and every title that commit-msg would reject
+goes through the same logic as prepare-commit-msg, so that 100k commits take seconds
+instead of the hours a `git rebase --exec` per commit takes. File contents are never
+read. The issue of a commit is taken, in order, from the mapping file given with --map
+(lines of `<commit> <issue or branch>`), from an issue already present in its title,
+from --branch, or from the name of the branch being rewritten for the commits that no
+other branch contains. Commits without an issue are left unchanged. With --linear, the
+referenced issues are fetched from Linear in batches first, and only issues that exist
+are used. The previous tips of rewritten refs are kept under refs/original/, like git
+filter-branch does.
+"""
+
+import os
+import re
+import subprocess
+from collections import Counter
+from collections.abc import Callable
+from typing import BinaryIO
+
+from git_hooks import cache
+from git_hooks import common
+from git_hooks import prepare_commit_msg
+
+issue_pattern = re.compile(common.issue_regex)
+
+
+def issue_branch(value: str) -> str:
+    # A bare issue reference is turned into the shortest branch name
+    # that extract_branch_data() understands
+    return f"{value}-" if issue_pattern.match(value) else value
+
+
+def replace_branch_issue(branch: str, issue: str) -> str:
+    # The branch name for issue, keeping the prefix of branch that gives the commit type
+    branch_match = common.branch_pattern.match(branch)
+    prefix = branch_match.group("prefix") if branch_match else None
+    return f"{prefix}/{issue}-" if prefix else issue_branch(issue)
+
+
+def read_issue_map(path: str, cwd: str | None = None) -> dict[str, str]:
+    entries = []
+    with open(path) as fh:
+        for line in fh:
+            if (line := line.strip()) and not line.startswith("#"):
+                fields = line.split(maxsplit=1)
+                if len(fields) != 2:
+                    raise ValueError(
+                        f"Expected <commit> <issue or branch> in {path}: {line}"
+                    )
+                entries.append((fields[0], fields[1].strip()))
+    # Resolve abbreviated or symbolic commits to the full ids that
+    # fast-export reports, in one git process
+    output = subprocess.run(
+        ["git", "cat-file", "--batch-check=%(objectname)"],
+        input="".join(f"{commit}^{{commit}}\n" for commit, _ in entries),
+        stdout=subprocess.PIPE,
+        cwd=cwd,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    issue_map = {}
+    for (commit, value), sha in zip(entries, output):
+        if sha.endswith(" missing") or sha.endswith(" ambiguous"):
+            raise ValueError(f"Unknown commit in {path}: {commit}")
+        issue_map[sha] = issue_branch(value)
+    return issue_map
+
+
+def rewrite_commit_msg(
+    commit_msg: str,
+    branch: str,
+    linear_issues: dict[str, dict[str, str]] | None = None,
+    mapped: bool = False,
+) -> str | None:
+    # Returns the rewritten message, or None if the message is valid already
+    # or no issue could be found for it. branch comes from the --map file if
+    # mapped, and its issue then replaces any issue in the title
+    title = common.parse_commit_msg_title(commit_msg)
+    if title.valid:
+        return None
+    from_title = bool(title.issue) and not mapped
+    if from_title:
+        branch = replace_branch_issue(branch, title.issue)
+    issue = prepare_commit_msg.extract_branch_data(branch)["issue"]
+    # An issue written in the title by the author is trusted, one
+    # derived from a branch name must exist in Linear
+    if not issue or (
+        linear_issues is not None and not from_title and issue not in linear_issues
+    ):
+        return None
+
+    # Only the title changes, the rest of the message is kept byte for byte
+    raw_commit_msg_title, newline, rest = commit_msg.partition("\n")
+    commit_msg_title, header_lines, _ = prepare_commit_msg.prepare_commit_msg_title(
+        raw_commit_msg_title, branch, False, (linear_issues or {}).__getitem__
+    )
+    if header := "\n".join(header_lines).strip("\n"):
+        commit_msg_title = f"{commit_msg_title}\n\n{header}\n"
+    return f"{commit_msg_title}{newline}{rest}"
+
+
+def rewrite_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    branch: str | None = None,
+    issue_map: dict[str, str] | None = None,
+    linear_issues: dict[str, dict[str, str]] | None = None,
+    report: Callable[[str, str, str], None] | None = None,
+    ref_commits: dict[str, set[str]] | None = None,
+) -> Counter:
+    # Copy a fast-export stream to dst, rewriting the message of every commit on the way
+    # The issue in the name of a ref only applies to the commits ref_commits lists
+    # for it if given, i.e. those that no other branch contains
+    stats = Counter(commits=0, rewritten=0, refs=0)
+    issue_map = issue_map or {}
+    ref = original_oid = None
+    for line in iter(src.readline, b""):
+        if line.startswith(b"commit "):
+            ref, original_oid = line[7:-1].decode(), None
+        elif line.startswith(b"original-oid "):
+            original_oid = line[13:-1].decode()
+        elif line.startswith(b"data "):
+            data = src.read(int(line[5:]))
+            if ref is not None:
+                stats["commits"] += 1
+                commit_msg = data.decode("utf-8", "surrogateescape")
+                mapped_branch = issue_map.get(original_oid or "")
+                commit_branch = mapped_branch or branch
+                if commit_branch is None:
+                    if ref_commits is None or original_oid in ref_commits.get(ref, ()):
+                        commit_branch = ref.removeprefix("refs/heads/")
+                    else:
+                        commit_branch = ""
+                new_commit_msg = rewrite_commit_msg(
+                    commit_msg,
+                    commit_branch,
+                    linear_issues,
+                    mapped=mapped_branch is not None,
+                )
+                if new_commit_msg is not None:
+                    stats["rewritten"] += 1
+                    data = new_commit_msg.encode("utf-8", "surrogateescape")
+                    line = b"data %d\n" % len(data)
+                    if report:
+                        report(
+                            original_oid or "",
+                            commit_msg.partition("\n")[0],
+                            new_commit_msg.partition("\n")[0],
+                        )
+                # Only the first data block after a commit command is its message
+                ref = None
+            dst.write(line)
+            dst.write(data)
+            continue
+        elif line.startswith((b"tag ", b"blob", b"reset ")):
+            ref = None
+        dst.write(line)
+    return stats
+
+
+def fetch_linear_issues(issues: list[str]) -> dict[str, dict[str, str]]:
+    linear_issues = {
+        issue: data for issue in issues if (data := cache.get(issue)) is not None
+    }
+    if not (missing := [issue for issue in issues if issue not in linear_issues]):
+        return linear_issues
+    fetched = prepare_commit_msg.retrieve_linear_issues(missing)
+    for issue, data in fetched.items():
+        cache.put(issue, data)
+    return {**linear_issues, **fetched}
+
+
+def list_refs(cwd: str | None = None) -> dict[str, str]:
+    output = subprocess.check_output(
+        ["git", "for-each-ref", "--format=%(objectname) %(refname)"], cwd=cwd, text=True
+    )
+    return {
+        ref: sha for sha, ref in (line.split(" ", 1) for line in output.splitlines())
+    }
+
+
+def current_branch_revisions(cwd: str | None = None) -> list[str]:
+    # The commits of the current branch that its upstream does not have yet
+    head = subprocess.check_output(
+        ["git", "symbolic-ref", "HEAD"], cwd=cwd, text=True
+    ).strip()
+    upstream = subprocess.run(
+        ["git", "rev-parse", "--symbolic-full-name", "@{upstream}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=cwd,
+        text=True,
+    ).stdout.strip()
+    if not upstream:
+        raise ValueError(
+            f"{head.removeprefix('refs/heads/')} has no upstream, "
+            "pass the revisions to rewrite, e.g. origin/main..HEAD"
+        )
+    return [head, f"^{upstream}"]
+
+
+def unique_commits(name: str, cwd: str | None = None) -> set[str]:
+    # The commits of branch name that no other branch, local or remote, contains
+    output = subprocess.check_output(
+        [
+            "git",
+            "rev-list",
+            f"refs/heads/{name}",
+            "--not",
+            f"--exclude={name}",
+            "--branches",
+            f"--exclude=*/{name}",
+            "--remotes",
+        ],
+        cwd=cwd,
+        text=True,
+    )
+    return set(output.split())
+
+
+def rewrite(
+    revisions: list[str],
+    branch: str | None = None,
+    issue_map: dict[str, str] | None = None,
+    linear: bool = False,
+    dry_run: bool = False,
+    cwd: str | None = None,
+) -> Counter:
+    if not revisions:
+        revisions = current_branch_revisions(cwd)
+
+    # An issue taken from the name of a rewritten branch is only stamped on the
+    # commits of that branch, not on those it shares with e.g. main
+    ref_commits = None
+    branches = list((issue_map or {}).values())
+    if branch:
+        branches.append(branch)
+    else:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--symbolic-full-name", *revisions],
+            cwd=cwd,
+            text=True,
+        )
+        names = [
+            ref.removeprefix("refs/heads/")
+            for ref in output.splitlines()
+            if ref.startswith("refs/heads/")
+        ]
+        branches += names
+        ref_commits = {
+            f"refs/heads/{name}": unique_commits(name, cwd)
+            for name in names
+            if prepare_commit_msg.extract_branch_data(name)["issue"]
+        }
+
+    linear_issues = None
+    if linear:
+        # The candidate issues are known before reading any history:
+        # they come from branch names and the map
+        issues = [
+            issue
+            for name in dict.fromkeys(branches)
+            if (issue := prepare_commit_msg.extract_branch_data(name)["issue"])
+        ]
+        linear_issues = fetch_linear_issues(issues)
+
+    old_refs = list_refs(cwd)
+    export = subprocess.Popen(
+        [
+            "git",
+            "fast-export",
+            "--no-data",
+            "--show-original-ids",
+            "--reencode=yes",
+            "--signed-tags=strip",
+            "--reference-excluded-parents",
+            *revisions,
+        ],
+        stdout=subprocess.PIPE,
+        cwd=cwd,
+    )
+    if dry_run:
+
+        def report(sha: str, old: str, new: str) -> None:
+            print(f"{sha[:12]} {old}\n{' ' * 12} -> {new}")
+
+        import_ = None
+        dst = open(os.devnull, "wb")
+    else:
+        report = None
+        import_ = subprocess.Popen(
+            ["git", "fast-import", "--force", "--quiet"], stdin=subprocess.PIPE, cwd=cwd
+        )
+        dst = import_.stdin
+    assert export.stdout is not None and dst is not None
+    try:
+        with export.stdout, dst:
+            stats = rewrite_stream(
+                export.stdout,
+                dst,
+                branch,
+                issue_map,
+                linear_issues,
+                report,
+                ref_commits,
+            )
+    finally:
+        if export.wait() != 0:
+            raise subprocess.CalledProcessError(export.returncode, export.args)
+        if import_ is not None and import_.wait() != 0:
+            raise subprocess.CalledProcessError(import_.returncode, import_.args)
+
+    if import_ is not None:
+        # Keep the previous tips of the refs that changed
+        backups = [
+            f"update refs/original/{ref} {old_refs[ref]}\n"
+            for ref, sha in list_refs(cwd).items()
+            if ref in old_refs
+            and old_refs[ref] != sha
+            and not ref.startswith("refs/original/")
+        ]
+        stats["refs"] = len(backups)
+        if backups:
+            subprocess.run(
+                ["git", "update-ref", "--stdin"],
+                input="".join(backups),
+                cwd=cwd,
+                text=True,
+                check=True,
+            )
+    return stats
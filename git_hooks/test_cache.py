@@ -0,0 +1,139 @@
+import os
+import time
+from unittest import mock
+import pytest
+import cache
+
+
+@pytest.fixture
+def issue_data():
+    return {"title": "Title", "description": "Description\n\n"}
+
+
+def test_get_missing():
+    assert cache.get("T-1234") is None
+
+
+def test_put_get(issue_data):
+    cache.put("t-1234", issue_data)
+    assert cache.get("T-1234") == issue_data
+
+
+def test_get_expired(issue_data):
+    cache.put("T-1234", issue_data)
+    with mock.patch("time.time", return_value=time.time() + cache.CACHE_TTL + 1):
+        assert cache.get("T-1234") is None
+
+
+@pytest.mark.parametrize("mode", ["off", "refresh"])
+def test_get_bypass(issue_data, mode):
+    cache.put("T-1234", issue_data)
+    with mock.patch("cache.CACHE_MODE", mode):
+        assert cache.get("T-1234") is None
+
+
+@mock.patch("cache.CACHE_MODE", "off")
+def test_put_off(issue_data):
+    cache.put("T-1234", issue_data)
+    assert not os.path.exists(cache.entry_path("T-1234"))
+
+
+def test_get_corrupt(issue_data):
+    cache.put("T-1234", issue_data)
+    with open(cache.entry_path("T-1234"), "w") as fh:
+        fh.write('{"fetched_at": ')
+    assert cache.get("T-1234") is None
+
+
+def test_lock():
+    with cache.lock("T-1234", timeout=1) as locked:
+        assert locked
+        start = time.monotonic()
+        with cache.lock("t-1234", timeout=0.05) as other:
+            assert not other
+        assert time.monotonic() - start >= 0.05
+        with cache.lock("T-1235", timeout=0) as other:
+            assert other
+    with cache.lock("T-1234", timeout=0) as locked:
+        assert locked
+
+
+@mock.patch("cache.CACHE_SIZE", 2)
+def test_evict_least_recently_used(issue_data):
+    for i, issue in enumerate(["T-1", "T-2"]):
+        cache.put(issue, issue_data)
+        os.utime(cache.entry_path(issue), (i, i))
+    cache.get("T-1")
+    cache.put("T-3", issue_data)
+    assert cache.get("T-1") == issue_data
+    assert cache.get("T-2") is None
+    assert cache.get("T-3") == issue_data
+
+
+def test_clear(issue_data):
+    cache.put("T-1234", issue_data)
+    cache.clear()
+    assert cache.get("T-1234") is None
+
+
+def test_clear_locks():
+    with cache.lock("T-1", timeout=0):
+        pass
+    with cache.lock("T-2", timeout=0) as locked:
+        assert locked
+        cache.clear()
+        # Only the lock that is held is kept
+        assert os.listdir(cache.locks_dir()) == ["T-2.lock"]
+        with cache.lock("T-2", timeout=0) as other:
+            assert not other
+    with cache.lock("T-1", timeout=0) as locked:
+        assert locked
+
+
+@mock.patch("cache.CACHE_SIZE", 1)
+def test_evict_locks(issue_data):
+    for issue in ["T-1", "T-2"]:
+        with cache.lock(issue, timeout=0):
+            cache.put(issue, issue_data)
+    with cache.lock("T-3", timeout=0):
+        cache.put("T-3", issue_data)
+        assert os.listdir(cache.locks_dir()) == ["T-3.lock"]
+
+
+def test_put_get_error(issue_data):
+    assert cache.get_error("T-1234", "key") is None
+    cache.put_error("t-1234", "key", ["Entity not found: Issue"])
+    assert cache.get_error("T-1234", "key") == ["Entity not found: Issue"]
+    assert cache.get_error("T-1234", "other") is None
+    with mock.patch("cache.CACHE_MODE", "refresh"):
+        assert cache.get_error("T-1234", "key") is None
+    # Errors expire well before issues do
+    cache.put("T-1234", issue_data)
+    with mock.patch(
+        "time.time", return_value=time.time() + cache.NEGATIVE_CACHE_TTL + 1
+    ):
+        assert cache.get_error("T-1234", "key") is None
+        assert cache.get("T-1234") == issue_data
+    assert not os.path.exists(cache.error_path("T-1234", "key"))
+
+
+def test_clear_errors():
+    cache.put_error("T-1234", "key", ["Entity not found: Issue"])
+    cache.clear()
+    assert cache.get_error("T-1234", "key") is None
+
+
+@pytest.mark.parametrize(
+    "platform, env, expected",
+    [
+        ("linux", {"XDG_CACHE_HOME": "/xdg"}, "/xdg/git-hooks"),
+        ("linux", {"HOME": "/home/me"}, "/home/me/.cache/git-hooks"),
+        ("darwin", {"HOME": "/Users/me"}, "/Users/me/Library/Caches/git-hooks"),
+        ("linux", {"GIT_HOOKS_CACHE_DIR": "/custom"}, "/custom"),
+    ],
+)
+def test_cache_dir(platform, env, expected):
+    with mock.patch("sys.platform", platform), mock.patch.dict(
+        "os.environ", env, clear=True
+    ):
+        assert cache.cache_dir() == expected
@@ -0,0 +1,41 @@
+from unittest import mock
+import pytest
+import cache
+from cli import main
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issues")
+def test_prefetch(mock_retrieve_linear_issues, git_repo, monkeypatch):
+    git_repo.commit("Initial commit")
+    git_repo.git("branch", "feat/t-2-second")
+    git_repo.git("branch", "no-issue")
+    monkeypatch.chdir(git_repo.path)
+    cache.put("T-3", {"title": "Cached", "description": ""})
+    mock_retrieve_linear_issues.return_value = {
+        "T-1": {"title": "One", "description": ""}
+    }
+    with mock.patch("sys.argv", ["git-hooks", "prefetch", "t-1", "T-3", "--branches"]):
+        with pytest.raises(SystemExit) as exit:
+            main()
+    assert exit.value.code == 0
+    mock_retrieve_linear_issues.assert_called_once_with(["T-1", "T-2"])
+    assert cache.get("T-1") == {"title": "One", "description": ""}
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", None)
+def test_prefetch_without_api_key():
+    with mock.patch("sys.argv", ["git-hooks", "prefetch", "T-1"]):
+        with pytest.raises(SystemExit) as exit:
+            main()
+    assert exit.value.code == 1
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("git_hooks.index.sync", return_value={"issues": 3, "pages": 1})
+def test_sync(mock_sync):
+    with mock.patch("sys.argv", ["git-hooks", "sync", "--team", "T", "--team", "L2"]):
+        with pytest.raises(SystemExit) as exit:
+            main()
+    assert exit.value.code == 0
+    mock_sync.assert_called_once_with(["T", "L2"], full=False)
@@ -0,0 +1,15 @@
+import os
+import socket
+import client
+
+
+def test_request_without_daemon():
+    assert client.request({"hook": "ping"}) is None
+
+
+def test_request_dead_socket():
+    path = client.socket_path()
+    os.makedirs(os.path.dirname(path))
+    with socket.socket(socket.AF_UNIX) as dead:
+        dead.bind(path)
+    assert client.prepare_commit_msg_title("", "t-1234-issue-title", False) is None
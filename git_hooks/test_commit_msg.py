@@ -2,6 +2,10 @@ import pytest
 from unittest import mock
 from commit_msg import get_exit_code
 from commit_msg import main
+from commit_msg import get_error
+from commit_msg import iter_commits
+from commit_msg import iter_invalid_commits
+from commit_msg import range_main
 
 
 @pytest.mark.parametrize(
@@ -17,6 +21,18 @@ def test_get_exit_code(commit_msg, exit_code):
     assert get_exit_code(commit_msg) == exit_code
 
 
+@pytest.mark.parametrize(
+    "commit_msg, reason",
+    [
+        ("feat: Amazing new feature", "reference to a Linear issue"),
+        ("T-5482/Amazing new feature", "conventional commit type"),
+        ("T-5482/feat Amazing new feature", "colon"),
+    ],
+)
+def test_get_error(commit_msg, reason):
+    assert reason in get_error(commit_msg)
+
+
 @mock.patch("sys.argv", ["commit_msg.py", "COMMIT_MSG"])
 def test_main():
     with mock.patch(
@@ -26,3 +42,74 @@ def test_main():
         with mock.patch("sys.exit") as mock_exit:
             main()
             mock_exit.assert_called_once_with(0)
+
+
+def test_import_time(import_time, import_budget_ms):
+    elapsed, modules = import_time("git_hooks.commit_msg")
+    assert not {"gql", "requests", "graphql"} & modules
+    assert elapsed < import_budget_ms
+
+
+def test_iter_commits(git_repo):
+    first = git_repo.commit("T-1/feat: First\n\nBody")
+    second = git_repo.commit("Second\nline")
+    assert list(iter_commits(["HEAD"], cwd=git_repo.path)) == [
+        (second, "Second"),
+        (first, "T-1/feat: First"),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_iter_invalid_commits(jobs):
+    commits = [
+        ("a", "T-1/feat: Valid"),
+        ("b", "Invalid"),
+        ("c", "Merge branch 'main'"),
+        ("d", "feat: No issue"),
+    ]
+    assert list(iter_invalid_commits(commits, jobs=jobs, chunk_size=3)) == [
+        ("b", "Invalid"),
+        ("d", "feat: No issue"),
+    ]
+
+
+def test_iter_invalid_commits_bounded():
+    pulled = 0
+
+    def commits():
+        nonlocal pulled
+        for i in range(100):
+            pulled += 1
+            yield str(i), "Invalid"
+
+    invalid_commits = iter_invalid_commits(commits(), jobs=2, chunk_size=1)
+    assert next(invalid_commits) == ("0", "Invalid")
+    # Only a few chunks per worker are read ahead of the results
+    assert pulled <= 5
+    assert len(list(invalid_commits)) == 99
+
+
+@pytest.mark.parametrize(
+    "messages, exit_code",
+    [
+        (["T-1/feat: First", "T-2/fix: Second"], 0),
+        (["T-1/feat: First", "Second"], 1),
+    ],
+)
+def test_range_main(git_repo, monkeypatch, capsys, messages, exit_code):
+    git_repo.commit("Initial commit")
+    for message in messages:
+        git_repo.commit(message)
+    monkeypatch.chdir(git_repo.path)
+    assert range_main(["--range", "HEAD~2..HEAD"]) == exit_code
+    if exit_code:
+        assert "1 of 2 commits" in capsys.readouterr().err
+
+
+def test_range_main_bad_range(git_repo, monkeypatch, capsys):
+    git_repo.commit("Initial commit")
+    monkeypatch.chdir(git_repo.path)
+    assert range_main(["--range", "nonexistent..HEAD"]) == 1
+    err = capsys.readouterr().err
+    assert "Could not list the commits in nonexistent..HEAD" in err
+    assert "Traceback" not in err
@@ -137,3 +137,39 @@ def test_issue_regex(issue: str):
 )
 def test_prefix_regex(prefix: str):
     assert re.match(common.prefix_regex, prefix)
+
+
+@pytest.mark.parametrize(
+    "commit_msg, expected",
+    [
+        ("T-1234/feat: add something", ("T-1234", "feat", False, "add something", "")),
+        ("xyz-1/feat!: break\nbody", ("XYZ-1", "feat", True, "break", "")),
+        ("Merge branch 'main'", ("", "", False, "Merge branch 'main'", "")),
+        ("Bump version 1 -> 2", ("", "", False, "Bump version 1 -> 2", "")),
+        ("feat: add something", ("", "feat", False, "add something", "issue")),
+        ("T-1234/add something", ("T-1234", "", False, "add something", "type")),
+        (
+            "T-1234/style add something",
+            ("T-1234", "style", False, "add something", "colon"),
+        ),
+        ("", ("", "", False, "", "issue")),
+    ],
+)
+def test_parse_commit_msg_title(commit_msg: str, expected: tuple):
+    title = common.parse_commit_msg_title(commit_msg)
+    assert title == expected
+    assert title.valid == (not expected[-1])
+    assert title.valid == bool(re.match(common.valid_commit_regex, commit_msg))
+
+
+@pytest.mark.parametrize(
+    "branch, expected",
+    [
+        ("feat/T-1234-fix-something", ("feat", "T-1234", "fix-something")),
+        ("a/b/xyz-13_update", ("a/b", "xyz-13", "update")),
+        ("abc-281-fix", (None, "abc-281", "fix")),
+    ],
+)
+def test_branch_pattern(branch: str, expected: tuple):
+    match = common.branch_pattern.match(branch)
+    assert match.group("prefix", "issue", "title") == expected
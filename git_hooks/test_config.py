@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+import pytest
+import common
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "src").mkdir()
+    return tmp_path
+
+
+def test_find_config_file(repo, monkeypatch):
+    monkeypatch.delenv("GIT_HOOKS_CONFIG", raising=False)
+    assert config.find_config_file(str(repo / "src")) is None
+    (repo / "pyproject.toml").write_text("[tool.other]\n")
+    assert config.find_config_file(str(repo / "src")) is None
+    (repo / "pyproject.toml").write_text('[tool.git-hooks]\nteams = ["TEAM"]\n')
+    assert config.find_config_file(str(repo / "src")) == str(repo / "pyproject.toml")
+    (repo / ".git-hooks.toml").write_text('teams = ["TEAM"]\n')
+    assert config.find_config_file(str(repo / "src")) == str(repo / ".git-hooks.toml")
+    monkeypatch.setenv("GIT_HOOKS_CONFIG", "/etc/git-hooks.toml")
+    assert config.find_config_file(str(repo / "src")) == "/etc/git-hooks.toml"
+
+
+def test_find_config_file_stops_at_repository_root(tmp_path, monkeypatch):
+    monkeypatch.delenv("GIT_HOOKS_CONFIG", raising=False)
+    (tmp_path / ".git-hooks.toml").write_text('teams = ["TEAM"]\n')
+    (tmp_path / "repo" / ".git").mkdir(parents=True)
+    assert config.find_config_file(str(tmp_path / "repo")) is None
+
+
+@pytest.mark.parametrize(
+    "filename, content, expected",
+    [
+        (".git-hooks.toml", "", {}),
+        (".git-hooks.toml", 'teams = ["TEAM"]\n', {"teams": ["TEAM"]}),
+        (
+            "pyproject.toml",
+            '[tool.git-hooks]\ncommit-types = { feat = "Feature" }\n',
+            {"commit_types": {"feat": "Feature"}},
+        ),
+    ],
+)
+def test_parse_config(filename, content, expected):
+    assert config.parse_config(content.encode(), filename) == expected
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "teams = [",
+        'teams = "T"',
+        "teams = [1]",
+        'commit-types = ["feat"]',
+        "commit-types = { feat = 1 }",
+    ],
+)
+def test_parse_config_invalid(content):
+    with pytest.raises(ValueError, match="Invalid configuration in .git-hooks.toml"):
+        config.parse_config(content.encode(), ".git-hooks.toml")
+
+
+def test_load(repo):
+    build = mock.Mock(side_effect=lambda **config: {"config": config})
+    build.__code__ = common.build_settings.__code__
+    build.__defaults__ = common.build_settings.__defaults__
+    assert config.load(build, str(repo)) == {"config": {}}
+
+    (repo / ".git-hooks.toml").write_text('teams = ["TEAM"]\n')
+    assert config.load(build, str(repo)) == {"config": {"teams": ["TEAM"]}}
+    # The second load is served from the cache without parsing the file
+    with mock.patch("config.parse_config", side_effect=AssertionError):
+        assert config.load(build, str(repo)) == {"config": {"teams": ["TEAM"]}}
+    assert build.call_count == 2
+
+    (repo / ".git-hooks.toml").write_text('teams = ["OTHER"]\n')
+    assert config.load(build, str(repo)) == {"config": {"teams": ["OTHER"]}}
+
+
+@pytest.mark.parametrize("issue", ["T-1", "PLATFORM-12", "platform-12", "L2-1"])
+def test_build_settings(issue):
+    settings = common.build_settings(
+        ["PLATFORM", "L2"], {"feat": "Feature", "ops": "Operations"}
+    )
+    assert "PLATFORM|" in settings["linear_ref"]
+    assert "T|" not in settings["linear_ref"]
+    assert "#\tops       Operations" in settings["commit_types_doc_commented"]
+    assert common.re.match(settings["valid_commit_regex"], f"{issue}/ops: Title")
+    assert not common.re.match(settings["valid_commit_regex"], f"{issue}/fix: Title")
+
+
+def test_configured_hook(repo, cache_dir):
+    (repo / ".git-hooks.toml").write_text(
+        'teams = ["PLATFORM"]\ncommit-types = { ops = "Operations" }\n'
+    )
+    (repo / "COMMIT_EDITMSG").write_text("PLATFORM-12/ops: Rotate keys\n")
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    env.pop("GIT_HOOKS_CONFIG", None)
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-m", "git_hooks.commit_msg", "COMMIT_EDITMSG"],
+            cwd=repo,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+    assert len(os.listdir(os.path.join(cache_dir, "config"))) == 1
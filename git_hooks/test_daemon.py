@@ -0,0 +1,67 @@
+import os
+import socket
+import threading
+from unittest import mock
+import pytest
+import client
+import daemon
+
+
+@pytest.fixture
+def server(cache_dir):
+    server = daemon.Server(client.socket_path())
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", None)
+def test_prepare_commit_msg(server):
+    assert client.prepare_commit_msg_title("", "feat/t-1234-issue-title", False) == (
+        "T-1234/feat: Issue title",
+        [],
+        [],
+    )
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", None)
+def test_other_config(server):
+    # A repository with its own teams is not served with the ones the
+    # daemon was started with
+    with mock.patch("git_hooks.common.teams", ["OTHER"]):
+        assert (
+            client.prepare_commit_msg_title("", "feat/t-1234-issue-title", False)
+            is None
+        )
+
+
+def test_commit_msg(server):
+    assert client.request({"hook": "commit-msg", "commit_msg": "Title"}) == {
+        "exit_code": 1
+    }
+
+
+def test_unknown_hook(server):
+    assert client.request({"hook": "pre-push"}) is None
+
+
+def test_already_running(server):
+    with pytest.raises(RuntimeError):
+        daemon.Server(client.socket_path())
+
+
+def test_stale_socket(cache_dir):
+    path = client.socket_path()
+    os.makedirs(os.path.dirname(path))
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(path)
+    server = daemon.Server(path, idle_timeout=0.01)
+    server.handle_request()
+    assert server.idle
+    server.server_close()
+    assert not os.path.exists(path)
@@ -0,0 +1,85 @@
+import json
+import urllib.error
+import urllib.request
+from fake_linear import FakeLinearServer
+
+
+def post(url: str, query: str, variables: dict) -> dict:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps({"query": query, "variables": variables}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_issue_query():
+    query = "query Issue($issue: String!) { issue(id: $issue) { title description } }"
+    with FakeLinearServer({"T-1": {"title": "Title", "description": "Body"}}) as server:
+        assert post(server.url, query, {"issue": "t-1"}) == {
+            "data": {"issue": {"title": "Title", "description": "Body"}}
+        }
+        response = post(server.url, query, {"issue": "T-2"})
+        assert response["data"] is None
+        assert response["errors"][0]["message"] == "Entity not found: Issue"
+        assert server.requests == 2
+        assert server.bytes_sent > 0
+
+
+def test_issues_query():
+    query = """
+    query Issues($first: Int, $after: String, $filter: IssueFilter) {
+      issues(first: $first, after: $after, filter: $filter, orderBy: updatedAt) {
+        nodes { identifier }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+    """
+    with FakeLinearServer() as server:
+        for i in range(5):
+            server.add_issue(
+                f"T-{i}", "Title", updated_at=f"2024-01-0{5 - i}T00:00:00.000Z"
+            )
+        server.add_issue("X-1", "Other team", updated_at="2024-01-09T00:00:00.000Z")
+        issue_filter = {
+            "team": {"key": {"in": ["T"]}},
+            "updatedAt": {"gt": "2024-01-01T00:00:00.000Z"},
+        }
+        page = post(server.url, query, {"first": 2, "filter": issue_filter})["data"][
+            "issues"
+        ]
+        assert [node["identifier"] for node in page["nodes"]] == ["T-3", "T-2"]
+        assert page["pageInfo"] == {"hasNextPage": True, "endCursor": "T-2"}
+        variables = {"first": 2, "after": "T-2", "filter": issue_filter}
+        page = post(server.url, query, variables)["data"]["issues"]
+        assert [node["identifier"] for node in page["nodes"]] == ["T-1", "T-0"]
+
+
+def test_error_rate():
+    query = "query Issue($issue: String!) { issue(id: $issue) { title } }"
+    with FakeLinearServer(
+        {"T-1": {"title": "Title"}}, error_rate=0.5, seed=0
+    ) as server:
+        statuses = []
+        for _ in range(40):
+            try:
+                post(server.url, query, {"issue": "T-1"})
+                statuses.append(200)
+            except urllib.error.HTTPError as error:
+                statuses.append(error.code)
+        assert set(statuses) == {200, 500}
+        assert server.errors == statuses.count(500)
+        assert server.requests == statuses.count(200)
+
+
+def test_description_size():
+    query = "query Issue($issue: String!) { issue(id: $issue) { description } }"
+    with FakeLinearServer(
+        {"T-1": {"title": "Title", "description": "Body"}}, description_size=10_000
+    ) as server:
+        description = post(server.url, query, {"issue": "T-1"})["data"]["issue"][
+            "description"
+        ]
+    assert len(description) == 10_000
+    assert description.startswith("BodyBody")
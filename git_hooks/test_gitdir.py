@@ -0,0 +1,155 @@
+import subprocess
+import pytest
+import gitdir
+
+
+def symbolic_ref(path) -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "symbolic-ref", "HEAD"],
+            cwd=path,
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except subprocess.CalledProcessError:
+        return None
+
+
+@pytest.fixture(autouse=True)
+def no_git_env(monkeypatch):
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    monkeypatch.delenv("GIT_CEILING_DIRECTORIES", raising=False)
+
+
+def test_branch(git_repo):
+    git_repo.commit("Initial commit")
+    git_repo.git("checkout", "-q", "-b", "feat/t-1234-title")
+    subdir = git_repo.path / "sub" / "dir"
+    subdir.mkdir(parents=True)
+    assert gitdir.find_git_dir(str(subdir)) == str(git_repo.path / ".git")
+    assert (
+        gitdir.read_head(gitdir.find_git_dir(str(subdir)))
+        == "refs/heads/feat/t-1234-title"
+    )
+
+
+def test_unborn_branch(git_repo):
+    assert gitdir.read_head(str(git_repo.path / ".git")) == symbolic_ref(git_repo.path)
+
+
+def test_detached(git_repo):
+    sha = git_repo.commit("Initial commit")
+    git_repo.git("checkout", "-q", "--detach")
+    assert symbolic_ref(git_repo.path) is None
+    assert gitdir.read_head(str(git_repo.path / ".git")) == sha
+
+
+def test_worktree(git_repo, tmp_path):
+    git_repo.commit("Initial commit")
+    worktree = tmp_path / "worktree"
+    git_repo.git("worktree", "add", "-q", "-b", "t-1-worktree", str(worktree))
+    git_dir = gitdir.find_git_dir(str(worktree))
+    assert git_dir == str(git_repo.path / ".git" / "worktrees" / "worktree")
+    assert (
+        gitdir.read_head(git_dir) == symbolic_ref(worktree) == "refs/heads/t-1-worktree"
+    )
+
+
+def test_submodule(git_repo, tmp_path):
+    git_repo.commit("Initial commit")
+    parent = tmp_path / "parent"
+    parent.mkdir()
+    subprocess.check_call(["git", "init", "-q", "-b", "main"], cwd=parent)
+    subprocess.check_call(
+        [
+            "git",
+            "-c",
+            "protocol.file.allow=always",
+            "submodule",
+            "add",
+            "-q",
+            str(git_repo.path),
+            "sub",
+        ],
+        cwd=parent,
+    )
+    submodule = parent / "sub"
+    subprocess.check_call(
+        ["git", "checkout", "-q", "-b", "t-2-submodule"], cwd=submodule
+    )
+    git_dir = gitdir.find_git_dir(str(submodule))
+    assert git_dir == str(parent / ".git" / "modules" / "sub")
+    assert (
+        gitdir.read_head(git_dir)
+        == symbolic_ref(submodule)
+        == "refs/heads/t-2-submodule"
+    )
+
+
+def test_git_dir_env(git_repo, monkeypatch, tmp_path):
+    monkeypatch.setenv("GIT_DIR", str(git_repo.path / ".git"))
+    assert gitdir.find_git_dir(str(tmp_path)) == str(git_repo.path / ".git")
+
+
+def test_ceiling_directories(git_repo, monkeypatch):
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", "/")
+    assert gitdir.find_git_dir(str(git_repo.path)) is None
+
+
+def test_no_repository(tmp_path):
+    assert gitdir.find_git_dir(str(tmp_path)) is None
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        ("ref: refs/heads/.invalid\n", None),
+        ("garbage\n", None),
+        ("ref: refs/heads/main\n", "refs/heads/main"),
+    ],
+)
+def test_read_head(tmp_path, head, expected):
+    (tmp_path / "HEAD").write_text(head)
+    assert gitdir.read_head(str(tmp_path)) == expected
+
+
+def test_operation_in_progress(git_repo):
+    git_dir = str(git_repo.path / ".git")
+    git_repo.commit("Initial commit")
+    assert gitdir.operation_in_progress(git_dir) is None
+
+    (git_repo.path / "file").write_text("main")
+    git_repo.git("add", "file")
+    git_repo.git("commit", "-q", "-m", "Main")
+    git_repo.git("checkout", "-q", "-b", "other", "HEAD~1")
+    (git_repo.path / "file").write_text("other")
+    git_repo.git("add", "file")
+    git_repo.git("commit", "-q", "-m", "Other")
+    with pytest.raises(subprocess.CalledProcessError):
+        git_repo.git("rebase", "main")
+    assert gitdir.operation_in_progress(git_dir) == "rebase"
+    git_repo.git("rebase", "--abort")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        git_repo.git("cherry-pick", "main")
+    assert gitdir.operation_in_progress(git_dir) == "cherry-pick"
+    git_repo.git("cherry-pick", "--abort")
+    assert gitdir.operation_in_progress(git_dir) is None
+
+
+@pytest.mark.parametrize(
+    "marker, expected",
+    [
+        ("rebase-merge/", "rebase"),
+        ("rebase-apply/applying", "am"),
+        ("REVERT_HEAD", "revert"),
+        ("BISECT_LOG", "bisect"),
+    ],
+)
+def test_operation_markers(tmp_path, marker, expected):
+    (tmp_path / marker).parent.mkdir(exist_ok=True)
+    if marker.endswith("/"):
+        (tmp_path / marker).mkdir()
+    else:
+        (tmp_path / marker).write_text("")
+    assert gitdir.operation_in_progress(str(tmp_path)) == expected
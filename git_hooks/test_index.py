@@ -0,0 +1,110 @@
+import os
+from unittest import mock
+import pytest
+import index
+from fake_linear import FakeLinearServer
+from prepare_commit_msg import cached_linear_issue
+from prepare_commit_msg import prepare_commit_msg
+from prepare_commit_msg import EDITOR_TEXT
+
+
+@pytest.fixture
+def server():
+    with FakeLinearServer() as server:
+        with mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_URL", server.url):
+            yield server
+
+
+def test_get_without_index():
+    assert index.get("T-1") is None
+    assert not os.path.exists(index.index_path())
+
+
+@mock.patch("index.SYNC_PAGE_SIZE", 2)
+def test_sync(server):
+    for i in range(5):
+        server.add_issue(
+            f"T-{i}", f"Issue {i}", updated_at=f"2024-01-0{i + 1}T00:00:00.000Z"
+        )
+    server.add_issue("X-1", "Other team")
+    assert index.sync(["T"]) == {"issues": 5, "pages": 3}
+    assert index.get("t-4") == {"title": "Issue 4", "description": None}
+    assert index.get("X-1") is None
+
+    # Only issues updated since the last one seen are fetched again
+    server.add_issue("T-1", "Renamed", "Details", updated_at="2024-02-01T00:00:00.000Z")
+    assert index.sync(["T"]) == {"issues": 2, "pages": 1}
+    assert index.get("T-1") == {"title": "Renamed", "description": "Details"}
+    assert index.sync(["T"]) == {"issues": 1, "pages": 1}
+    assert index.sync(["T"], full=True) == {"issues": 5, "pages": 3}
+
+
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_cached_linear_issue_from_index(mock_retrieve_linear_issue, server):
+    server.add_issue("T-1", " Title ", "Details")
+    index.sync(["T"])
+    assert cached_linear_issue("T-1") == {
+        "title": "Title",
+        "description": "Details\n\n",
+    }
+    mock_retrieve_linear_issue.assert_not_called()
+
+
+def test_suggest(server):
+    assert index.suggest(["payment"]) == []
+    server.add_issue("T-1", "Retry failed payments")
+    server.add_issue(
+        "T-2", "Payment provider outage", updated_at="2024-01-02T00:00:00.000Z"
+    )
+    server.add_issue("T-3", "Onboarding emails", updated_at="2024-01-03T00:00:00.000Z")
+    index.sync(["T"])
+    assert index.suggest(["payment", "retry"]) == [
+        ("T-1", "Retry failed payments"),
+        ("T-2", "Payment provider outage"),
+    ]
+    # Words are never read as query syntax
+    assert index.suggest(['"provider', "OR", "NEAR("]) == [
+        ("T-2", "Payment provider outage")
+    ]
+    assert len(index.suggest(["payment"], limit=1)) == 1
+    assert index.suggest(["payment"], limit=0) == []
+
+    # Words found in too many titles only count when no other word is left
+    with mock.patch.object(index, "SUGGEST_COMMON_WORD_ISSUES", 2):
+        assert index.suggest(["payment", "outage"]) == [
+            ("T-2", "Payment provider outage")
+        ]
+        assert index.suggest(["payment", "failed"]) == [
+            ("T-1", "Retry failed payments")
+        ]
+        assert index.suggest(["payment"]) == index.suggest(["payment"], limit=2)
+        assert len(index.suggest(["payment"])) == 2
+
+    # The full-text index follows changes to titles
+    server.add_issue(
+        "T-3", "Payment reminder emails", updated_at="2024-01-04T00:00:00.000Z"
+    )
+    index.sync(["T"])
+    assert ("T-3", "Payment reminder emails") in index.suggest(["reminder"])
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", None)
+def test_prepare_commit_msg_suggestions(server):
+    server.add_issue("T-1", "Retry failed payments")
+    index.sync(["T"])
+    commit_msg = prepare_commit_msg(
+        f"fix: Payment retry\n{EDITOR_TEXT}\n", "payment-retry"
+    )
+    assert commit_msg.startswith(
+        "fix: Payment retry\n\n"
+        "# No Linear issue found in the branch name. Issues with similar titles:\n"
+        "#\n"
+        "#\tT-1\tRetry failed payments\n"
+        "#\n"
+        "# Prefix the title with one of them, e.g. T-1/fix: Payment retry\n"
+    )
+    # Only suggested in the editor, and only if no issue is referenced anywhere
+    assert "T-1" not in prepare_commit_msg("fix: Payment retry", "payment-retry")
+    assert "T-1" not in prepare_commit_msg(
+        f"T-2/fix: Payment retry\n{EDITOR_TEXT}\n", "payment-retry"
+    )
@@ -0,0 +1,56 @@
+from unittest import mock
+import pytest
+import cache
+from post_checkout import main
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("git_hooks.prepare_commit_msg.get_branch_name")
+@mock.patch("post_checkout.prefetch.spawn")
+@pytest.mark.parametrize(
+    "flag, branch, cached, spawned",
+    [
+        ("1", "feat/t-1234-issue-title", False, True),
+        ("1", "feat/t-1234-issue-title", True, False),
+        ("0", "feat/t-1234-issue-title", False, False),
+        ("1", "issue-title", False, False),
+        ("1", None, False, False),
+    ],
+)
+def test_main(mock_spawn, mock_get_branch_name, flag, branch, cached, spawned):
+    mock_get_branch_name.return_value = branch
+    if cached:
+        cache.put("T-1234", {"title": "Title", "description": ""})
+    with mock.patch("sys.argv", ["post_checkout.py", "a" * 40, "b" * 40, flag]):
+        main()
+    if spawned:
+        mock_spawn.assert_called_once_with("T-1234")
+    else:
+        mock_spawn.assert_not_called()
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", None)
+@mock.patch("post_checkout.prefetch.spawn")
+def test_main_without_api_key(mock_spawn):
+    with mock.patch("sys.argv", ["post_checkout.py", "a" * 40, "b" * 40, "1"]):
+        main()
+    mock_spawn.assert_not_called()
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch(
+    "git_hooks.prepare_commit_msg.get_branch_name",
+    return_value="feat/t-1234-issue-title",
+)
+@mock.patch("post_checkout.prefetch.spawn")
+@pytest.mark.parametrize("checkout_type, spawned", [("1", True), ("0", False)])
+def test_main_pre_commit(
+    mock_spawn, mock_get_branch_name, monkeypatch, checkout_type, spawned
+):
+    # pre-commit passes the hook arguments through the environment
+    monkeypatch.setenv("PRE_COMMIT_FROM_REF", "a" * 40)
+    monkeypatch.setenv("PRE_COMMIT_TO_REF", "b" * 40)
+    monkeypatch.setenv("PRE_COMMIT_CHECKOUT_TYPE", checkout_type)
+    with mock.patch("sys.argv", ["post_checkout.py"]):
+        main()
+    assert mock_spawn.called == spawned
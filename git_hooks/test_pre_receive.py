@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import pytest
+from pre_receive import read_ref_updates
+from pre_receive import validate_ref_updates
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def remote(git_repo, tmp_path, monkeypatch):
+    path = tmp_path / "remote.git"
+    subprocess.check_call(["git", "init", "-q", "--bare", str(path)])
+    git_repo.git("remote", "add", "origin", str(path))
+    # History pushed before the hook was installed is left alone
+    git_repo.commit("Initial commit")
+    git_repo.git("push", "-q", "origin", "main")
+    hook = path / "hooks" / "pre-receive"
+    hook.write_text(f'#!/bin/sh\nexec "{sys.executable}" -m git_hooks.pre_receive\n')
+    hook.chmod(0o755)
+    monkeypatch.setenv("PYTHONPATH", ROOT)
+    return path
+
+
+def push(git_repo, *refspecs: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "push", "origin", *refspecs],
+        cwd=git_repo.path,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_read_ref_updates():
+    lines = [f"{'0' * 40} {'a' * 40} refs/heads/main\n", "\n"]
+    assert read_ref_updates(lines) == [("0" * 40, "a" * 40, "refs/heads/main")]
+
+
+def test_push_valid(git_repo, remote):
+    git_repo.commit("T-1/feat: First")
+    git_repo.commit("Merge branch 'feature'")
+    assert push(git_repo, "main").returncode == 0
+
+
+def test_push_invalid(git_repo, remote):
+    git_repo.commit("T-1/feat: First")
+    sha = git_repo.commit("Second")
+    git_repo.git("checkout", "-q", "-b", "feature", "HEAD~1")
+    git_repo.commit("T-2/fix: Third")
+    result = push(git_repo, "main", "feature")
+    assert result.returncode != 0
+    assert "refs/heads/main: 1 invalid commit message(s)" in result.stderr
+    assert sha[:12] in result.stderr
+    assert "refs/heads/feature:" not in result.stderr
+
+
+def test_validate_ref_updates_existing_commits(git_repo, remote):
+    # The initial commit was already pushed, so a new ref pointing at it
+    # introduces nothing to validate
+    head = git_repo.git("rev-parse", "HEAD")
+    updates = [("0" * 40, head, "refs/heads/copy"), (head, "0" * 40, "refs/heads/gone")]
+    assert validate_ref_updates(updates, cwd=str(remote)) == {}
@@ -0,0 +1,66 @@
+import sys
+import time
+from unittest import mock
+import cache
+import prefetch
+
+
+@mock.patch("subprocess.Popen")
+def test_spawn(mock_popen):
+    prefetch.spawn("T-1234", debounce=0.5)
+    pending = cache.read_json(prefetch.pending_path())
+    assert pending["issue"] == "T-1234"
+    args = mock_popen.call_args.args[0]
+    assert args == [
+        sys.executable,
+        "-m",
+        "git_hooks.prefetch",
+        "T-1234",
+        pending["token"],
+        "0.5",
+    ]
+    assert mock_popen.call_args.kwargs["start_new_session"]
+
+
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issue")
+def test_run(mock_retrieve_linear_issue):
+    mock_retrieve_linear_issue.return_value = {"title": "Title", "description": ""}
+    cache.write_json(prefetch.pending_path(), {"issue": "T-1234", "token": "token"})
+    prefetch.run("T-1234", "token", 0)
+    mock_retrieve_linear_issue.assert_called_once_with("T-1234")
+    assert cache.get("T-1234") == {"title": "Title", "description": ""}
+
+
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issue")
+def test_run_superseded(mock_retrieve_linear_issue):
+    cache.write_json(prefetch.pending_path(), {"issue": "T-5678", "token": "newer"})
+    prefetch.run("T-1234", "token", 0.01)
+    mock_retrieve_linear_issue.assert_not_called()
+
+
+@mock.patch("subprocess.Popen")
+def test_spawn_without_debounce(mock_popen):
+    # Refreshes do not supersede the prefetch of a branch just checked out
+    prefetch.spawn("T-1234", debounce=0.5)
+    pending = cache.read_json(prefetch.pending_path())
+    prefetch.spawn("T-5678", debounce=0)
+    assert cache.read_json(prefetch.pending_path()) == pending
+    assert mock_popen.call_count == 2
+
+
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issue")
+def test_run_stale(mock_retrieve_linear_issue):
+    mock_retrieve_linear_issue.return_value = {"title": "New title", "description": ""}
+    cache.put("T-1234", {"title": "Title", "description": ""})
+    with mock.patch(
+        "git_hooks.cache.CACHE_MAX_STALE", 10 * cache.CACHE_TTL
+    ), mock.patch("time.time", return_value=time.time() + cache.CACHE_TTL + 1):
+        prefetch.run("T-1234", "token", 0)
+        assert cache.get("T-1234") == {"title": "New title", "description": ""}
+
+
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issue")
+def test_run_cached(mock_retrieve_linear_issue):
+    cache.put("T-1234", {"title": "Title", "description": ""})
+    prefetch.run("T-1234", "token", 0)
+    mock_retrieve_linear_issue.assert_not_called()
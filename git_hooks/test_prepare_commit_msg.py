@@ -1,20 +1,33 @@
 from unittest import mock
+import asyncio
+import concurrent.futures
 import pytest
 import subprocess
+import time
+from prepare_commit_msg import cached_linear_issue
 from prepare_commit_msg import extract_branch_data
 from prepare_commit_msg import extract_commit_msg_title_data
 from prepare_commit_msg import get_branch_name
+from prepare_commit_msg import linear_client
+from prepare_commit_msg import linear_cooldown
 from prepare_commit_msg import retrieve_linear_issue
+from prepare_commit_msg import retrieve_linear_data
+from prepare_commit_msg import retrieve_linear_issues
 from prepare_commit_msg import prepare_commit_msg
 from prepare_commit_msg import prefix_to_commit_type
 from prepare_commit_msg import main
+from prepare_commit_msg import run_async
+from prepare_commit_msg import read_commit_msg_head
+from prepare_commit_msg import record_linear_result
+from prepare_commit_msg import prepare_commit_msg_title
+from prepare_commit_msg import write_commit_msg
 
 from prepare_commit_msg import EDITOR_TEXT
+from fake_linear import FakeLinearServer
 
 
 @mock.patch("prepare_commit_msg.linear_client")
 @mock.patch("prepare_commit_msg.get_branch_name")
-@mock.patch("sys.argv", ["prepare_commit_msg.py", "COMMIT_MSG"])
 @mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
 @pytest.mark.parametrize(
     "read_data, branch, linear_called",
@@ -32,6 +45,7 @@ def test_main(
     branch,
     linear_called,
     exception,
+    tmp_path,
 ):
     mock_get_branch_name.return_value = branch
     mock_client = mock.Mock()
@@ -40,7 +54,9 @@ def test_main(
     }
     mock_client.execute.side_effect = exception
     mock_linear_client.return_value = mock_client
-    with mock.patch("builtins.open", mock.mock_open(read_data=read_data)):
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text(read_data)
+    with mock.patch("sys.argv", ["prepare_commit_msg.py", str(commit_msg_file)]):
         # check exit code
         main()
     mock_get_branch_name.assert_called_once()
@@ -50,8 +66,9 @@ def test_main(
         mock_client.execute.assert_not_called()
 
 
+@mock.patch("prepare_commit_msg.gitdir.read_head", return_value=None)
 @pytest.mark.parametrize("expected", ["feat/branch", "branch", None])
-def test_get_branch_name(expected):
+def test_get_branch_name(mock_read_head, expected):
     with mock.patch(
         "subprocess.check_output",
         return_value=expected.encode() if expected else expected,
@@ -60,6 +77,18 @@ def test_get_branch_name(expected):
         assert get_branch_name() == expected
 
 
+@pytest.mark.parametrize(
+    "head, expected",
+    [("refs/heads/feat/t-1-title", "feat/t-1-title"), ("a" * 40, None)],
+)
+def test_get_branch_name_without_git(head, expected):
+    with mock.patch(
+        "prepare_commit_msg.gitdir.read_head", return_value=head
+    ), mock.patch("subprocess.check_output") as mock_check_output:
+        assert get_branch_name() == expected
+    mock_check_output.assert_not_called()
+
+
 @mock.patch("prepare_commit_msg.linear_client")
 def test_retrieve_linear_issue(mock_linear_client):
     mock_client = mock.Mock()
@@ -73,6 +102,26 @@ def test_retrieve_linear_issue(mock_linear_client):
     }
 
 
+@pytest.mark.parametrize(
+    "mode, requests, validated",
+    [("bundled", 1, True), ("off", 1, False), ("remote", 2, True)],
+)
+def test_retrieve_linear_issue_schema_mode(mode, requests, validated):
+    with FakeLinearServer({"T-5482": {"title": "Title"}}) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url), mock.patch(
+            "prepare_commit_msg.LINEAR_SCHEMA_MODE", mode
+        ):
+            client = linear_client()
+            assert retrieve_linear_issue("T-5482") == {
+                "title": "Title",
+                "description": "",
+            }
+        assert server.requests == requests
+    assert (
+        client.schema is not None or client.fetch_schema_from_transport
+    ) == validated
+
+
 @pytest.mark.parametrize(
     "branch, expected",
     [
@@ -267,3 +316,451 @@ def test_prefix_to_commit_type_with_default_feat(prefix, expected):
 def test_prefix_to_commit_type_with_default_chore(prefix, expected):
     result = prefix_to_commit_type(prefix)
     assert result == expected
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_retrieve_linear_data_cached(mock_retrieve_linear_issue):
+    mock_retrieve_linear_issue.return_value = {
+        "title": "Title",
+        "description": "Description\n\n",
+    }
+    expected = {"commit_msg_title": "Title", "commit_msg_body": "Description\n\n"}
+    assert retrieve_linear_data("T-5482", edit_mode=True) == expected
+    assert retrieve_linear_data("T-5482", edit_mode=True) == expected
+    mock_retrieve_linear_issue.assert_called_once_with("T-5482")
+
+
+def test_import_time(import_time, import_budget_ms):
+    elapsed, modules = import_time("git_hooks.prepare_commit_msg")
+    assert not {"gql", "requests", "graphql"} & modules
+    # Nor what a commit prepared by the daemon does not need
+    assert not {"subprocess", "git_hooks.index", "git_hooks.linear_schema"} & modules
+    assert elapsed < import_budget_ms
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_TIMEOUT_MS", 50)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_retrieve_linear_data_timeout(mock_retrieve_linear_issue):
+    mock_retrieve_linear_issue.side_effect = lambda issue: time.sleep(1)
+    linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+    assert "Linear did not respond within 50 ms" in linear_data["commit_msg_body"]
+    assert "title derived from the branch name" in linear_data["commit_msg_body"]
+    assert retrieve_linear_data("T-5482", edit_mode=False) == {}
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_TIMEOUT_MS", 300)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_cached_linear_issue_deadline(mock_retrieve_linear_issue):
+    import contextlib
+    import threading
+    import cache
+
+    mock_retrieve_linear_issue.side_effect = lambda issue: time.sleep(1)
+    with contextlib.ExitStack() as stack:
+        # Another process fetching the issue holds its lock for 200 ms
+        assert stack.enter_context(cache.lock("T-5482", timeout=0))
+        threading.Timer(0.2, stack.close).start()
+        start = time.monotonic()
+        with pytest.raises(TimeoutError, match="within 300 ms"):
+            cached_linear_issue("T-5482")
+        elapsed = time.monotonic() - start
+    # The fetch only gets what is left of the budget after waiting for the lock
+    assert 0.25 < elapsed < 0.45
+    mock_retrieve_linear_issue.assert_called_once_with("T-5482")
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_FAILURES", 2)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_retrieve_linear_data_circuit_breaker(mock_retrieve_linear_issue):
+    mock_retrieve_linear_issue.side_effect = ConnectionError("Connection refused")
+    for _ in range(3):
+        linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+    assert mock_retrieve_linear_issue.call_count == 2
+    assert "Skipping Linear for another 300 s" in linear_data["commit_msg_body"]
+
+    # Linear is queried again once the cool-down has passed and a
+    # success closes the breaker
+    mock_retrieve_linear_issue.side_effect = None
+    mock_retrieve_linear_issue.return_value = {"title": "Title", "description": ""}
+    with mock.patch("time.time", return_value=time.time() + 301):
+        assert (
+            retrieve_linear_data("T-5482", edit_mode=True)["commit_msg_title"]
+            == "Title"
+        )
+    assert linear_cooldown() == 0
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_FAILURES", 1)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_retrieve_linear_data_query_error(mock_retrieve_linear_issue):
+    exception = Exception("Query error")
+    exception.errors = [{"message": "Entity not found: Issue"}]
+    mock_retrieve_linear_issue.side_effect = exception
+    linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+    assert "#\tEntity not found: Issue" in linear_data["commit_msg_body"]
+    assert linear_cooldown() == 0
+
+
+@mock.patch("prepare_commit_msg.LINEAR_FAILURES", 16)
+@mock.patch("prepare_commit_msg.LINEAR_BREAKER_LOCK_TIMEOUT", 5)
+def test_record_linear_result_concurrent():
+    # Failures of concurrent hooks are all counted
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        list(executor.map(record_linear_result, [False] * 16))
+    assert linear_cooldown() > 0
+
+
+def test_cached_linear_issue_concurrent():
+    # Hooks missing the same issue at the same time fetch it once and share the result
+    with FakeLinearServer({"T-1": {"title": "Title"}}, latency=0.2) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url):
+            with concurrent.futures.ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(cached_linear_issue, ["T-1"] * 8))
+        assert server.requests == 1
+    assert results == [{"title": "Title", "description": ""}] * 8
+
+
+@pytest.mark.parametrize("batch_size, requests", [(50, 1), (1, 2)])
+def test_retrieve_linear_issues(batch_size, requests):
+    issues = {"T-1": {"title": "One"}, "T-2": {"title": "Two", "description": "Body"}}
+    with FakeLinearServer(issues) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url), mock.patch(
+            "prepare_commit_msg.LINEAR_BATCH_SIZE", batch_size
+        ):
+            assert retrieve_linear_issues(["T-1", "t-2", "T-1"]) == {
+                "T-1": {"title": "One", "description": ""},
+                "T-2": {"title": "Two", "description": "Body\n\n"},
+            }
+        assert server.requests == requests
+
+
+def test_retrieve_linear_issues_missing():
+    issues = {f"T-{i}": {"title": f"Issue {i}"} for i in range(8) if i != 5}
+    with FakeLinearServer(issues) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url):
+            linear_issues = retrieve_linear_issues([f"T-{i}" for i in range(8)])
+        # The unknown issue is dropped and the others fetched again,
+        # instead of bisecting the batch
+        assert server.requests == 2
+    assert sorted(linear_issues) == sorted(issues)
+
+
+def test_retrieve_linear_issues_rejected():
+    from gql.transport.exceptions import TransportQueryError
+
+    session = mock.Mock()
+    error = {
+        "message": "Authentication required",
+        "extensions": {"code": "AUTHENTICATION_ERROR"},
+    }
+    session.execute.side_effect = TransportQueryError(error["message"], errors=[error])
+    with mock.patch("prepare_commit_msg.linear_session", session):
+        with pytest.raises(TransportQueryError):
+            retrieve_linear_issues([f"T-{i}" for i in range(500)])
+    # An error that fails every issue is not retried issue by issue
+    assert session.execute.call_count == 1
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+@mock.patch("prepare_commit_msg.get_branch_name_async", new_callable=mock.AsyncMock)
+@pytest.mark.parametrize(
+    "raw_commit_msg, expected_title",
+    [
+        (f"\n{EDITOR_TEXT}\n", "T-1234/feat: Title"),
+        ("Custom title\n", "T-1234/feat: Custom title"),
+        ("T-5482/fix: Amazing new feature\n", "T-5482/fix: Amazing new feature"),
+    ],
+)
+def test_run_async(
+    mock_get_branch_name_async,
+    mock_retrieve_linear_issue,
+    tmp_path,
+    raw_commit_msg,
+    expected_title,
+):
+    mock_get_branch_name_async.return_value = "feat/t-1234-issue-title"
+    mock_retrieve_linear_issue.return_value = {
+        "title": "Title",
+        "description": "Description\n\n",
+    }
+    commit_msg_file = tmp_path / "COMMIT_EDITMSG"
+    commit_msg_file.write_text(raw_commit_msg)
+    with mock.patch("sys.argv", ["prepare_commit_msg.py", str(commit_msg_file)]):
+        asyncio.run(run_async())
+    commit_msg = commit_msg_file.read_text()
+    assert commit_msg.splitlines()[0] == expected_title
+    if raw_commit_msg.strip():
+        # The lookup started before the message was read is abandoned when
+        # the message has a title, it may not have reached Linear yet
+        assert mock_retrieve_linear_issue.call_args_list in ([], [mock.call("T-1234")])
+    else:
+        # The lookup starts before the message is read
+        mock_retrieve_linear_issue.assert_called_once_with("T-1234")
+    if expected_title != "T-5482/fix: Amazing new feature":
+        # The result matches the sequential path
+        assert commit_msg == prepare_commit_msg(
+            raw_commit_msg, "feat/t-1234-issue-title"
+        )
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_FAILURES", 1)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+def test_cached_linear_issue_abandoned(mock_retrieve_linear_issue):
+    import threading
+    from gql.transport.exceptions import TransportQueryError
+
+    abandoned = threading.Event()
+    abandoned.set()
+    mock_retrieve_linear_issue.side_effect = ConnectionError("Connection refused")
+    with pytest.raises(ConnectionError):
+        cached_linear_issue("T-1", abandoned=abandoned)
+    assert linear_cooldown() == 0
+    mock_retrieve_linear_issue.side_effect = TransportQueryError(
+        "Entity not found: Issue", errors=[{"message": "Entity not found: Issue"}]
+    )
+    with pytest.raises(TransportQueryError):
+        cached_linear_issue("T-1", abandoned=abandoned)
+    # Nothing was recorded, the next lookup asks Linear again
+    mock_retrieve_linear_issue.side_effect = None
+    mock_retrieve_linear_issue.return_value = {"title": "Title", "description": ""}
+    assert cached_linear_issue("T-1") == {"title": "Title", "description": ""}
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+@mock.patch("prepare_commit_msg.get_branch_name_async", new_callable=mock.AsyncMock)
+def test_run_async_linear_error(
+    mock_get_branch_name_async, mock_retrieve_linear_issue, tmp_path
+):
+    mock_get_branch_name_async.return_value = "feat/t-1234-issue-title"
+    mock_retrieve_linear_issue.side_effect = ConnectionError("Connection refused")
+    commit_msg_file = tmp_path / "COMMIT_EDITMSG"
+    commit_msg_file.write_text(f"\n{EDITOR_TEXT}\n")
+    with mock.patch("sys.argv", ["prepare_commit_msg.py", str(commit_msg_file)]):
+        asyncio.run(run_async())
+    commit_msg = commit_msg_file.read_text()
+    assert commit_msg.startswith("T-1234/feat: Issue title\n")
+    assert "#\tConnection refused" in commit_msg
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", None)
+@mock.patch("prepare_commit_msg.STREAM_CHUNK_SIZE", 4)
+@pytest.mark.parametrize(
+    "raw_commit_msg",
+    [
+        "",
+        "\n",
+        "\n\n",
+        "Title",
+        "Title\n",
+        "Title\n\nBody line\nand another one\n",
+        "Title\nBody without blank line",
+        f"\n{EDITOR_TEXT}\n# On branch test\n",
+        f"Title\n\nBody\n\n{EDITOR_TEXT}\n",
+    ],
+)
+@pytest.mark.parametrize("branch", ["test/t-1234-issue-title", "issue-title"])
+def test_write_commit_msg(tmp_path, raw_commit_msg, branch):
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text(raw_commit_msg)
+    raw_commit_msg_title, edit_mode = read_commit_msg_head(str(commit_msg_file))
+    assert edit_mode == (EDITOR_TEXT in raw_commit_msg)
+    write_commit_msg(
+        str(commit_msg_file),
+        *prepare_commit_msg_title(raw_commit_msg_title, branch, edit_mode),
+    )
+    assert commit_msg_file.read_text() == prepare_commit_msg(raw_commit_msg, branch)
+    assert [path.name for path in tmp_path.iterdir()] == ["COMMIT_MSG"]
+
+
+@mock.patch("prepare_commit_msg.get_branch_name", return_value="main")
+def test_main_unchanged(mock_get_branch_name, tmp_path):
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text("feat: Amazing new feature\n\nBody\n")
+    stat = commit_msg_file.stat()
+    with mock.patch("sys.argv", ["prepare_commit_msg.py", str(commit_msg_file)]):
+        main()
+    assert commit_msg_file.stat().st_ino == stat.st_ino
+    assert commit_msg_file.read_text() == "feat: Amazing new feature\n\nBody\n"
+
+
+@mock.patch(
+    "prepare_commit_msg.get_branch_name", return_value="feat/t-1234-issue-title"
+)
+@pytest.mark.parametrize(
+    "args, operation, skipped",
+    [
+        ([], None, False),
+        (["message"], None, False),
+        (["template"], None, False),
+        (["merge"], None, True),
+        (["squash"], None, True),
+        (["commit", "0123456789abcdef0123456789abcdef01234567"], None, True),
+        (["message"], "rebase", True),
+        ([], "cherry-pick", True),
+    ],
+)
+def test_main_skip(mock_get_branch_name, args, operation, skipped, tmp_path):
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text("Amazing new feature\n")
+    with mock.patch(
+        "sys.argv", ["prepare_commit_msg.py", str(commit_msg_file), *args]
+    ), mock.patch(
+        "prepare_commit_msg.gitdir.operation_in_progress", return_value=operation
+    ):
+        main()
+    assert mock_get_branch_name.called != skipped
+    assert commit_msg_file.read_text().startswith(
+        "Amazing" if skipped else "T-1234/feat: Amazing"
+    )
+
+
+@mock.patch("prepare_commit_msg.gitdir.operation_in_progress", return_value=None)
+@pytest.mark.parametrize("async_mode", [False, True])
+@pytest.mark.parametrize(
+    "source, object_name, skipped",
+    [
+        ("message", "", False),
+        ("merge", "", True),
+        ("commit", "0123456789abcdef0123456789abcdef01234567", True),
+    ],
+)
+def test_main_skip_pre_commit(
+    mock_operation_in_progress,
+    async_mode,
+    source,
+    object_name,
+    skipped,
+    monkeypatch,
+    tmp_path,
+):
+    # pre-commit passes only the message file and the rest in the environment
+    monkeypatch.setenv("PRE_COMMIT_COMMIT_MSG_SOURCE", source)
+    monkeypatch.setenv("PRE_COMMIT_COMMIT_OBJECT_NAME", object_name)
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text("Amazing new feature\n")
+    with mock.patch(
+        "sys.argv", ["prepare_commit_msg.py", str(commit_msg_file)]
+    ), mock.patch("prepare_commit_msg.ASYNC_MODE", async_mode), mock.patch(
+        "prepare_commit_msg.get_branch_name", return_value="feat/t-1234-issue-title"
+    ), mock.patch(
+        "prepare_commit_msg.get_branch_name_async",
+        new_callable=mock.AsyncMock,
+        return_value="feat/t-1234-issue-title",
+    ):
+        main()
+    assert commit_msg_file.read_text().startswith(
+        "Amazing" if skipped else "T-1234/feat: Amazing"
+    )
+
+
+@mock.patch("prepare_commit_msg.SKIP", set())
+@mock.patch("prepare_commit_msg.gitdir.operation_in_progress")
+def test_main_skip_disabled(mock_operation_in_progress, tmp_path):
+    commit_msg_file = tmp_path / "COMMIT_MSG"
+    commit_msg_file.write_text("Amazing new feature\n")
+    with mock.patch(
+        "sys.argv", ["prepare_commit_msg.py", str(commit_msg_file), "commit", "HEAD"]
+    ), mock.patch(
+        "prepare_commit_msg.get_branch_name", return_value="feat/t-1234-issue-title"
+    ):
+        main()
+    mock_operation_in_progress.assert_not_called()
+    assert commit_msg_file.read_text().startswith("T-1234/feat: Amazing")
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+def test_retrieve_linear_data_negative_cache():
+    with FakeLinearServer({"T-1": {"title": "Title"}}) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url):
+            for _ in range(3):
+                linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+                assert "#\tEntity not found: Issue" in linear_data["commit_msg_body"]
+            assert server.requests == 1
+            # Another API key may have access to the issue
+            with mock.patch("prepare_commit_msg.LINEAR_API_KEY", "OTHER_API_KEY"):
+                retrieve_linear_data("T-5482", edit_mode=True)
+            assert server.requests == 2
+            server.add_issue("T-5482", "Created since")
+            with mock.patch("time.time", return_value=time.time() + 3600):
+                assert (
+                    retrieve_linear_data("T-5482", edit_mode=True)["commit_msg_title"]
+                    == "Created since"
+                )
+            assert server.requests == 3
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+@pytest.mark.parametrize("code, cached", [(401, True), (403, True), (500, False)])
+def test_retrieve_linear_data_negative_cache_http(
+    mock_retrieve_linear_issue, code, cached
+):
+    from gql.transport.exceptions import TransportServerError
+
+    mock_retrieve_linear_issue.side_effect = TransportServerError(f"{code} Error", code)
+    for _ in range(2):
+        linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+        assert f"#\t{code} Error" in linear_data["commit_msg_body"]
+    assert mock_retrieve_linear_issue.call_count == (1 if cached else 2)
+
+
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("prepare_commit_msg.LINEAR_FAILURES", 2)
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+@pytest.mark.parametrize(
+    "extensions, cached",
+    [
+        ({"code": "INTERNAL_SERVER_ERROR"}, False),
+        ({"code": "AUTHENTICATION_ERROR"}, True),
+        ({"type": "forbidden"}, True),
+    ],
+)
+def test_retrieve_linear_data_negative_cache_graphql(
+    mock_retrieve_linear_issue, extensions, cached
+):
+    from gql.transport.exceptions import TransportQueryError
+
+    error = {"message": "Something went wrong", "extensions": extensions}
+    mock_retrieve_linear_issue.side_effect = TransportQueryError(
+        error["message"], errors=[error]
+    )
+    for _ in range(2):
+        linear_data = retrieve_linear_data("T-5482", edit_mode=True)
+        assert "#\tSomething went wrong" in linear_data["commit_msg_body"]
+    assert mock_retrieve_linear_issue.call_count == (1 if cached else 2)
+    # Other errors reported by Linear count towards the breaker
+    assert (linear_cooldown() > 0) is not cached
+
+
+@mock.patch("prepare_commit_msg.retrieve_linear_issue")
+@mock.patch("git_hooks.prefetch.spawn")
+@pytest.mark.parametrize("age, refreshed", [(0, False), (2, True), (20, False)])
+def test_cached_linear_issue_stale(
+    mock_spawn, mock_retrieve_linear_issue, age, refreshed
+):
+    mock_retrieve_linear_issue.side_effect = [
+        {"title": "Title", "description": ""},
+        {"title": "New title", "description": ""},
+    ]
+    with mock.patch("prepare_commit_msg.cache.CACHE_TTL", 1), mock.patch(
+        "prepare_commit_msg.cache.CACHE_MAX_STALE", 10
+    ):
+        cached_linear_issue("T-1")
+        with mock.patch("time.time", return_value=time.time() + age):
+            linear_issue = cached_linear_issue("T-1")
+    # Within the staleness bound the stored copy is used and refreshed
+    # in the background, beyond it Linear is waited for
+    assert linear_issue["title"] == ("New title" if age > 10 else "Title")
+    if refreshed:
+        mock_spawn.assert_called_once_with("T-1", debounce=0)
+    else:
+        mock_spawn.assert_not_called()
+    assert mock_retrieve_linear_issue.call_count == (2 if age > 10 else 1)
@@ -0,0 +1,164 @@
+import concurrent.futures
+import os
+import threading
+import time
+from unittest import mock
+import pytest
+import ratelimit
+from graphql import ExecutionResult
+from fake_linear import FakeLinearServer
+from prepare_commit_msg import linear_cooldown
+from prepare_commit_msg import retrieve_linear_data
+from prepare_commit_msg import retrieve_linear_issue
+from prepare_commit_msg import retrieve_linear_issues
+
+
+@mock.patch("ratelimit.RATE_LIMIT", 36000)
+@mock.patch("ratelimit.BURST", 2)
+def test_acquire():
+    assert ratelimit.acquire(0) < 0.05
+    assert ratelimit.acquire(0) < 0.05
+    # The bucket is empty, the next token comes after 0.1 s
+    with pytest.raises(ratelimit.RateLimited):
+        ratelimit.acquire(0.01)
+    assert 0.05 < ratelimit.acquire(1) < 0.5
+
+
+@mock.patch("ratelimit.RATE_LIMIT", 36000)
+@mock.patch("ratelimit.BURST", 2)
+@mock.patch("ratelimit.local_state", {})
+@mock.patch("ratelimit.cache.lock")
+def test_acquire_unlocked(mock_lock):
+    # Without the lock the budget is kept in memory, the file is left alone
+    mock_lock.return_value.__enter__.return_value = False
+    assert ratelimit.acquire(0) < 0.05
+    assert ratelimit.acquire(0) < 0.05
+    with pytest.raises(ratelimit.RateLimited):
+        ratelimit.acquire(0.01)
+    assert not os.path.exists(ratelimit.state_path())
+
+
+@mock.patch("ratelimit.RATE_LIMIT", 0)
+def test_acquire_unlimited():
+    for _ in range(100):
+        assert ratelimit.acquire(0) < 0.05
+
+
+def test_block():
+    ratelimit.block(time.time() + 60)
+    with pytest.raises(ratelimit.RateLimited) as exc_info:
+        ratelimit.acquire(1)
+    assert 59 < exc_info.value.retry_after <= 60
+    assert "retry in 60 s" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"Retry-After": "30"}, 30),
+        (
+            {
+                "X-RateLimit-Requests-Remaining": "10",
+                "X-RateLimit-Requests-Reset": "4102444800000",
+            },
+            None,
+        ),
+        (
+            {
+                "X-RateLimit-Requests-Remaining": "0",
+                "X-RateLimit-Requests-Reset": "4102444800000",
+            },
+            4102444800,
+        ),
+        (
+            {
+                "X-RateLimit-Complexity-Remaining": "0",
+                "X-RateLimit-Complexity-Reset": "4102444800000",
+            },
+            4102444800,
+        ),
+    ],
+)
+def test_reset_time(headers, expected):
+    reset = ratelimit.reset_time(headers)
+    if expected is None or expected > time.time():
+        assert reset == expected
+    else:
+        assert reset == pytest.approx(time.time() + expected, abs=1)
+
+
+@mock.patch("ratelimit.BACKOFF_BASE", 0.01)
+def test_transport_retries_429():
+    issues = {f"T-{i}": {"title": f"Issue {i}"} for i in range(6)}
+    with FakeLinearServer(issues, rate_limit=2, rate_limit_window=0.2) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url), mock.patch(
+            "prepare_commit_msg.LINEAR_BATCH_SIZE", 1
+        ):
+            start = time.monotonic()
+            assert len(retrieve_linear_issues(list(issues))) == 6
+            elapsed = time.monotonic() - start
+        assert server.requests == 6
+    # The remaining budget reported by the server holds requests back
+    # until the window resets
+    assert server.rate_limited == 0
+    assert elapsed > 0.4
+
+
+@mock.patch("ratelimit.BACKOFF_BASE", 0.01)
+def test_transport_concurrent():
+    # Concurrent clients refused at the same time all wait for the reset
+    # and get through eventually
+    issues = {f"T-{i}": {"title": f"Issue {i}"} for i in range(8)}
+    with FakeLinearServer(issues, rate_limit=3, rate_limit_window=0.2) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url), mock.patch(
+            "prepare_commit_msg.LINEAR_TIMEOUT_MS", 5000
+        ):
+            with concurrent.futures.ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(retrieve_linear_issue, issues))
+        assert [result["title"] for result in results] == [
+            issue["title"] for issue in issues.values()
+        ]
+        assert server.requests == 8
+        assert server.rate_limited > 0
+
+
+def test_transport_shared():
+    # The daemon shares one transport between its threads, which send
+    # their requests one at a time
+    active = max_active = 0
+    guard = threading.Lock()
+
+    def execute(self, *args, **kwargs):
+        nonlocal active, max_active
+        with guard:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with guard:
+            active -= 1
+        return ExecutionResult(data={})
+
+    transport = ratelimit.RateLimitedTransport(url="http://localhost")
+    with mock.patch.object(ratelimit.RequestsHTTPTransport, "execute", execute):
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(transport.execute, range(8)))
+    assert max_active == 1
+
+
+@mock.patch("ratelimit.RATE_LIMIT_RETRIES", 2)
+@mock.patch("ratelimit.BACKOFF_BASE", 0.01)
+@mock.patch("prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+def test_rate_limited_hook():
+    with FakeLinearServer(
+        {"T-1": {"title": "Title"}}, rate_limit=0, rate_limit_window=60
+    ) as server:
+        with mock.patch("prepare_commit_msg.LINEAR_API_URL", server.url):
+            linear_data = retrieve_linear_data("T-1", edit_mode=True)
+        assert server.requests == 0
+        assert server.rate_limited == 1
+    assert (
+        "#\tLinear rate limit reached, retry in 60 s" in linear_data["commit_msg_body"]
+    )
+    # Being rate limited does not count as Linear being down
+    assert linear_cooldown() == 0
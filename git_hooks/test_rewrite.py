@@ -0,0 +1,154 @@
+from unittest import mock
+import pytest
+import cache
+from rewrite import read_issue_map
+from rewrite import rewrite
+from rewrite import rewrite_commit_msg
+
+
+@pytest.mark.parametrize(
+    "commit_msg, branch, expected",
+    [
+        ("T-1/feat: Valid\n", "t-2-branch", None),
+        ("Merge branch 'main'\n", "t-2-branch", None),
+        ("Add feature\n", "main", None),
+        ("Add feature\n", "t-2-branch", "T-2/feat: Add feature\n"),
+        (
+            "Add feature\n\nBody\n\n\nkept",
+            "fix/t-2-branch",
+            "T-2/fix: Add feature\n\nBody\n\n\nkept",
+        ),
+        ("fix: Add feature", "t-2-branch", "T-2/fix: Add feature"),
+        ("L2-3/Add feature\n", "t-2-branch", "L2-3/feat: Add feature\n"),
+        ("t-3/fix Add feature\n", "main", "T-3/fix: Add feature\n"),
+        # The issue in the title keeps the commit type of the branch
+        ("T-1/Some title\n", "fix/t-9-branch", "T-1/fix: Some title\n"),
+    ],
+)
+def test_rewrite_commit_msg(commit_msg, branch, expected):
+    assert rewrite_commit_msg(commit_msg, branch) == expected
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+def test_rewrite_commit_msg_linear():
+    linear_issues = {"T-2": {"title": "From Linear", "description": "Details\n\n"}}
+    assert (
+        rewrite_commit_msg("Add feature\n", "t-2-branch", linear_issues)
+        == "T-2/feat: Add feature\n"
+    )
+    assert rewrite_commit_msg("\nBody\n", "t-2-branch", linear_issues) == (
+        "T-2/feat: From Linear\n\nDetails\n\nBody\n"
+    )
+    # Issues derived from a branch name are only used if they exist
+    assert rewrite_commit_msg("Add feature\n", "t-3-branch", linear_issues) is None
+    assert (
+        rewrite_commit_msg("T-3/Add feature\n", "main", linear_issues)
+        == "T-3/feat: Add feature\n"
+    )
+
+
+def log(git_repo, *args: str) -> list[str]:
+    return git_repo.git("log", "--format=%s", *args).splitlines()
+
+
+def test_rewrite(git_repo):
+    git_repo.commit("Initial commit")
+    git_repo.git("checkout", "-q", "--track", "-b", "fix/t-12-thing")
+    git_repo.commit("Start the thing")
+    git_repo.commit("T-5/feat: Valid")
+    git_repo.git("tag", "-a", "-m", "Release", "v1")
+    git_repo.commit("Fix the thing")
+    tip = git_repo.git("rev-parse", "HEAD")
+
+    stats = rewrite([], cwd=git_repo.path, dry_run=True)
+    assert (stats["commits"], stats["rewritten"]) == (3, 2)
+    assert git_repo.git("rev-parse", "HEAD") == tip
+
+    stats = rewrite([], cwd=git_repo.path)
+    assert (stats["commits"], stats["rewritten"], stats["refs"]) == (3, 2, 1)
+    # By default only the commits the upstream does not have are rewritten
+    assert log(git_repo) == [
+        "T-12/fix: Fix the thing",
+        "T-5/feat: Valid",
+        "T-12/fix: Start the thing",
+        "Initial commit",
+    ]
+    assert git_repo.git("rev-parse", "refs/original/refs/heads/fix/t-12-thing") == tip
+    assert git_repo.git("status", "--porcelain") == ""
+
+
+def test_rewrite_range_with_map(git_repo, tmp_path):
+    base = git_repo.commit("Initial commit")
+    first = git_repo.commit("First change")
+    git_repo.commit("Second change")
+    third = git_repo.commit("T-3/Third change")
+    git_repo.commit("T-4/Fourth change")
+    issue_map = tmp_path / "issues.txt"
+    issue_map.write_text(
+        f"# commit issue\n{first[:7]} T-7\n{third[:7]} fix/t-9-thing\n"
+    )
+
+    issues = read_issue_map(str(issue_map), git_repo.path)
+    rewrite(
+        [f"{base}..main"],
+        branch="chore/t-1-cleanup",
+        issue_map=issues,
+        cwd=git_repo.path,
+    )
+    # The map takes precedence over an issue in the title
+    assert log(git_repo) == [
+        "T-4/chore: Fourth change",
+        "T-9/fix: Third change",
+        "T-1/chore: Second change",
+        "T-7/feat: First change",
+        "Initial commit",
+    ]
+    assert git_repo.git("rev-parse", "HEAD~4") == base
+
+
+def test_rewrite_without_upstream(git_repo):
+    git_repo.git("checkout", "-q", "-b", "fix/t-12-thing")
+    git_repo.commit("Initial commit")
+    with pytest.raises(ValueError, match="no upstream"):
+        rewrite([], cwd=git_repo.path)
+
+
+def test_rewrite_shared_commits(git_repo):
+    git_repo.commit("Initial commit")
+    git_repo.git("checkout", "-q", "-b", "fix/t-12-thing")
+    git_repo.commit("Fix the thing")
+    rewrite(["fix/t-12-thing"], cwd=git_repo.path)
+    # The commit main also contains does not get the issue of the branch
+    assert log(git_repo) == ["T-12/fix: Fix the thing", "Initial commit"]
+
+
+@pytest.mark.parametrize("line", ["T-7", "0123456789abcdef"])
+def test_read_issue_map_missing_value(git_repo, tmp_path, line):
+    issue_map = tmp_path / "issues.txt"
+    issue_map.write_text(f"{line}\n")
+    with pytest.raises(ValueError, match="Expected <commit> <issue or branch>"):
+        read_issue_map(str(issue_map), git_repo.path)
+
+
+def test_read_issue_map_unknown_commit(git_repo, tmp_path):
+    git_repo.commit("Initial commit")
+    issue_map = tmp_path / "issues.txt"
+    issue_map.write_text("0123456789abcdef T-7\n")
+    with pytest.raises(ValueError):
+        read_issue_map(str(issue_map), git_repo.path)
+
+
+@mock.patch("git_hooks.prepare_commit_msg.LINEAR_API_KEY", "API_KEY")
+@mock.patch("git_hooks.prepare_commit_msg.retrieve_linear_issues")
+def test_rewrite_linear(mock_retrieve_linear_issues, git_repo):
+    git_repo.git("checkout", "-q", "-b", "t-12-thing")
+    git_repo.commit("Initial commit")
+    cache.put("T-2", {"title": "Cached", "description": ""})
+    mock_retrieve_linear_issues.return_value = {}
+
+    rewrite(["t-12-thing"], branch="t-2-other", linear=True, cwd=git_repo.path)
+    mock_retrieve_linear_issues.assert_not_called()
+    assert log(git_repo) == ["T-2/feat: Initial commit"]
+
+    rewrite(["t-12-thing"], linear=True, cwd=git_repo.path, dry_run=True)
+    mock_retrieve_linear_issues.assert_called_with(["T-12"])
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+import tracing
+
+
+@mock.patch("tracing.TRACE_PATH", None)
+def test_span_disabled():
+    with tracing.span("phase") as span:
+        pass
+    assert span is tracing.NULL_SPAN
+    tracing.flush()
+    assert tracing.events == []
+
+
+def test_span(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    with mock.patch("tracing.TRACE_PATH", str(path)):
+        with tracing.span("outer"):
+            with tracing.span("inner", issue="T-1"):
+                pass
+        tracing.flush()
+        tracing.flush()
+    inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert inner["args"] == {"issue": "T-1"}
+    assert inner["ph"] == outer["ph"] == "X"
+    assert outer["ts"] <= inner["ts"] and inner["dur"] <= outer["dur"]
+    assert tracing.events == []
+
+
+def test_commit_msg_main(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    commit_msg_path = tmp_path / "COMMIT_EDITMSG"
+    commit_msg_path.write_text("T-5482/feat: Amazing new feature")
+    subprocess.run(
+        [sys.executable, "-m", "git_hooks.commit_msg", str(commit_msg_path)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "GIT_HOOKS_TRACE": str(path)},
+        check=True,
+        capture_output=True,
+    )
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names[-3:] == ["read_commit_msg", "validate", "commit-msg"]
+    if sys.platform == "linux":
+        assert names[0] == "startup"
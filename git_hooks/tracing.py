@@ -0,0 +1,102 @@
+"""Opt-in tracing of hook phases. Set GIT_HOOKS_TRACE to a file path and every hook
+run appends its spans to it as Chrome trace events ("ph": "X"), one JSON object per
+line; `jq -s . trace.jsonl > trace.json` turns them into a file that chrome://tracing
+or https://ui.perfetto.dev can load. On Linux a "startup" span covers the time from
+process creation until the hook started, at clock tick (usually 10 ms) resolution.
+When GIT_HOOKS_TRACE is not set, span() returns a shared no-op context manager.
+"""
+
+import os
+import sys
+import time
+
+TRACE_PATH = os.environ.get("GIT_HOOKS_TRACE")
+
+events: list[dict] = []
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time_ns() // 1000
+        return self
+
+    def __exit__(self, *args):
+        record(self.name, self.start, time.time_ns() // 1000 - self.start, self.args)
+        return None
+
+
+def span(name: str, **args) -> Span | NullSpan:
+    if not TRACE_PATH:
+        return NULL_SPAN
+    return Span(name, args)
+
+
+def record(name: str, start: int, duration: int, args: dict | None = None) -> None:
+    import threading
+
+    event = {
+        "name": name,
+        "ph": "X",
+        "ts": start,
+        "dur": duration,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    events.append(event)
+
+
+def process_start_us() -> int | None:
+    # Process creation time from /proc, in microseconds since the epoch
+    try:
+        with open("/proc/self/stat") as fh:
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    return int((time.time() - age) * 1_000_000)
+
+
+def record_startup() -> None:
+    if not TRACE_PATH or (start := process_start_us()) is None:
+        return
+    now = time.time_ns() // 1000
+    record("startup", start, max(0, now - start), {"argv": sys.argv})
+
+
+def flush() -> None:
+    global events
+    if not TRACE_PATH or not events:
+        return
+    import json
+
+    lines = "".join(json.dumps(event) + "\n" for event in events)
+    events = []
+    try:
+        # Appending whole lines in one write keeps concurrently running
+        # hooks from interleaving events
+        fd = os.open(TRACE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, lines.encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass